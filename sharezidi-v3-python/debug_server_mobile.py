@@ -2,6 +2,8 @@
 """
 Fixed WebSocket server with proper WebRTC data channel handling
 """
+import asyncio
+import os
 import json
 import logging
 import random
@@ -9,6 +11,13 @@ import string
 from datetime import datetime
 from typing import Dict, Any, Optional
 
+import orjson
+try:
+    # Binary signaling frames skip UTF-8 validation and pack SDP blobs
+    # tighter than JSON; only used for clients that negotiate it
+    import msgpack
+except ImportError:
+    msgpack = None
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.responses import HTMLResponse, Response, RedirectResponse
 from starlette.middleware.base import BaseHTTPMiddleware
@@ -16,6 +25,10 @@ from starlette.middleware.base import BaseHTTPMiddleware
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _dumps(obj) -> str:
+    """Serialize with orjson (5-6x faster than stdlib json on signaling payloads)."""
+    return orjson.dumps(obj).decode()
+
 # Middleware to disable caching for all responses
 class NoCacheMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
@@ -47,23 +60,43 @@ class ConnectionManager:
         self.active_connections: Dict[str, WebSocket] = {}
         self.client_info: Dict[str, Dict] = {}
         self.device_ids: Dict[str, str] = {}  # Maps client_id to device_id
-    
+        self.out_queues: Dict[str, asyncio.Queue] = {}
+        self._writer_tasks: Dict[str, asyncio.Task] = {}
+        self.msgpack_clients: set = set()  # Clients that negotiated the msgpack subprotocol
+        # Serialized devices_updated frame, rebuilt only after (dis)connects
+        self._device_list_cache: Optional[bytes] = None
+
     async def connect(self, websocket: WebSocket, client_id: str, client_info: Dict = None):
-        await websocket.accept()
+        # Clients that offer the "msgpack" subprotocol get binary signaling
+        # frames; everyone else keeps JSON text frames
+        offered = websocket.scope.get("subprotocols") or []
+        use_msgpack = msgpack is not None and "msgpack" in offered
+        await websocket.accept(subprotocol="msgpack" if use_msgpack else None)
+        if use_msgpack:
+            self.msgpack_clients.add(client_id)
         self.active_connections[client_id] = websocket
         self.client_info[client_id] = client_info or {}
-        
+        self.out_queues[client_id] = asyncio.Queue()
+        self._writer_tasks[client_id] = asyncio.create_task(self._writer(client_id))
+
         # Generate and assign device ID
         device_id = generate_device_id()
         self.device_ids[client_id] = device_id
-        
+        self._device_list_cache = None
+
         logger.info(f"Client {client_id} connected with device ID {device_id}. Total connections: {len(self.active_connections)}")
-    
+
     def disconnect(self, client_id: str):
+        self._device_list_cache = None
         if client_id in self.active_connections:
             del self.active_connections[client_id]
         if client_id in self.client_info:
             del self.client_info[client_id]
+        self.out_queues.pop(client_id, None)
+        self.msgpack_clients.discard(client_id)
+        task = self._writer_tasks.pop(client_id, None)
+        if task is not None:
+            task.cancel()
         if client_id in self.device_ids:
             device_id = self.device_ids[client_id]
             del self.device_ids[client_id]
@@ -83,12 +116,52 @@ class ConnectionManager:
                     del self.active_connections[client_id]
                 if client_id in self.device_ids:
                     del self.device_ids[client_id]
+                self._device_list_cache = None
                 return False
         return False
-    
+
+    async def send_payload_to_client(self, client_id: str, payload) -> bool:
+        """Send a dict payload, msgpack-binary when the client negotiated it."""
+        if client_id in self.msgpack_clients:
+            websocket = self.active_connections.get(client_id)
+            if websocket is None:
+                return False
+            try:
+                await websocket.send_bytes(msgpack.packb(payload, use_bin_type=True))
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send message to {client_id}: {e}")
+                self.active_connections.pop(client_id, None)
+                self.device_ids.pop(client_id, None)
+                self._device_list_cache = None
+                return False
+        return await self.send_to_client(client_id, _dumps(payload))
+
+    def queue_to_client(self, client_id: str, payload: Dict):
+        """Queue a signaling payload; the per-client writer coalesces bursts."""
+        q = self.out_queues.get(client_id)
+        if q is not None:
+            q.put_nowait(payload)
+
+    async def _writer(self, client_id: str):
+        """Long-lived per-client sender: drains the outbound queue and packs
+        whatever has accumulated into a single frame (an array when >1), so an
+        ICE trickle burst costs one send instead of one per candidate."""
+        q = self.out_queues[client_id]
+        try:
+            while True:
+                batch = [await q.get()]
+                while not q.empty():
+                    batch.append(q.get_nowait())
+                message = batch[0] if len(batch) == 1 else batch
+                if not await self.send_payload_to_client(client_id, message):
+                    break
+        except asyncio.CancelledError:
+            pass
+
     async def broadcast_to_others(self, sender_id: str, message: Dict):
         """Broadcast message to all clients except sender"""
-        message_str = json.dumps(message)
+        message_str = _dumps(message)
         other_clients = [cid for cid in self.active_connections.keys() if cid != sender_id]
         logger.info(f"Broadcasting from {sender_id} to {len(other_clients)} other clients: {message}")
         
@@ -101,25 +174,45 @@ class ConnectionManager:
 
     async def broadcast_device_list_update(self):
         """Broadcast updated device list to all connected clients"""
-        all_devices = {cid: self.device_ids.get(cid, "Unknown") for cid in self.active_connections.keys()}
-        
-        for client_id in list(self.active_connections.keys()):
-            try:
-                # For each client, send list excluding itself
-                other_clients = [cid for cid in self.active_connections.keys() if cid != client_id]
-                other_devices = {cid: self.device_ids.get(cid, "Unknown") for cid in other_clients}
-                
-                await self.active_connections[client_id].send_text(json.dumps({
-                    "type": "devices_updated",
-                    "total_connections": len(self.active_connections),
-                    "clients": list(self.active_connections.keys()),
-                    "devices": all_devices,
-                    "other_clients": other_clients,
-                    "other_devices": other_devices
-                }))
-                logger.info(f"Sent device list update to {client_id}")
-            except Exception as e:
-                logger.error(f"Failed to send device list update to {client_id}: {e}")
+        if not self.active_connections:
+            return
+
+        # Serialize once per codec and fan out binary frames; each page
+        # filters its own id out of the list client-side. device_ids is
+        # already the client->device map kept in sync on (dis)connect, so
+        # no per-broadcast comprehension is needed, and the bytes are
+        # reused until membership actually changes. msgpack clients must
+        # get msgpack frames — a binary frame is msgpack to them by the
+        # send_payload_to_client convention
+        cached = self._device_list_cache
+        if cached is None:
+            state = {
+                "type": "devices_updated",
+                "total_connections": len(self.active_connections),
+                "clients": list(self.active_connections.keys()),
+                "devices": self.device_ids
+            }
+            json_payload = orjson.dumps(state)
+            packed_payload = (
+                msgpack.packb(state, use_bin_type=True)
+                if self.msgpack_clients else None
+            )
+            cached = self._device_list_cache = (json_payload, packed_payload)
+        json_payload, packed_payload = cached
+
+        client_ids = list(self.active_connections.keys())
+        results = await asyncio.gather(
+            *(self.active_connections[cid].send_bytes(
+                packed_payload if cid in self.msgpack_clients else json_payload
+            ) for cid in client_ids),
+            return_exceptions=True,
+        )
+        for cid, result in zip(client_ids, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to send device list update to {cid}: {result}")
+                # A failed send means the socket is dead; drop it so later
+                # broadcasts stop paying for it
+                self.disconnect(cid)
 
 manager = ConnectionManager()
 
@@ -137,7 +230,7 @@ async def get_stats():
         "connections": {
             "total": len(manager.active_connections),
             "clients": list(manager.active_connections.keys()),
-            "devices": {client_id: manager.device_ids.get(client_id, "Unknown") for client_id in manager.active_connections.keys()}
+            "devices": dict(manager.device_ids)
         }
     }
 
@@ -166,6 +259,7 @@ async def test_page():
         input {{ padding: 5px; margin: 5px; }}
         .progress-bar {{ background: #e0e0e0; border-radius: 4px; height: 20px; margin: 5px 0; }}
         .progress-fill {{ background: #4CAF50; height: 100%; border-radius: 4px; transition: width 0.3s; }}
+        .success-banner {{ background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em; }}
     </style>
 </head>
 <body>
@@ -239,6 +333,12 @@ async def test_page():
         let myDeviceId = null;
         
         // WebRTC variables
+        // Data-channel frame tags: every frame is binary with a leading
+        // little-endian u32 tag, so the receiver never branches on typeof
+        // or runs JSON.parse in the per-chunk path.
+        const FRAME_META = 0;
+        const FRAME_CHUNK = 1;
+        const FRAME_COMPLETE = 2;
         let peerConnection = null;
         let dataChannel = null;
         let pendingChunks = [];
@@ -284,6 +384,33 @@ async def test_page():
             iceTransportPolicy: 'all'  // Use both STUN and TURN
         }};
         
+        // ICE candidates arrive in a burst over ~1s; coalesce them into a
+        // single signaling frame instead of one WebSocket send per candidate.
+        let iceBatch = [];
+        let iceTimer = null;
+        let iceTarget = null;
+
+        function flushIceCandidates() {{
+            if (iceTimer) {{ clearTimeout(iceTimer); iceTimer = null; }}
+            if (iceBatch.length === 0) return;
+            ws.send(JSON.stringify(Object.assign({{
+                type: 'webrtc_ice_candidates',
+                candidates: iceBatch
+            }}, iceTarget)));
+            iceBatch = [];
+        }}
+
+        function queueIceCandidate(candidate, target) {{
+            iceTarget = target;
+            if (candidate) {{
+                iceBatch.push(candidate);
+                if (!iceTimer) iceTimer = setTimeout(flushIceCandidates, 50);
+            }} else {{
+                // null candidate = end of gathering, flush immediately
+                flushIceCandidates();
+            }}
+        }}
+
         function log(message) {{
             const messagesDiv = document.getElementById('messages');
             const timestamp = new Date().toLocaleTimeString();
@@ -304,7 +431,9 @@ async def test_page():
             const wsUrl = `ws://${{wsHost}}/ws/${{clientId}}?device_type=desktop&supports_webrtc=true`;
             log(`WebSocket URL: ${{wsUrl}}`);
             ws = new WebSocket(wsUrl);
-            
+            // Broadcasts arrive as binary frames (serialized once server-side)
+            ws.binaryType = 'arraybuffer';
+
             ws.onopen = function(event) {{
                 document.getElementById('status').textContent = 'Connected!';
                 document.getElementById('status').className = 'status connected';
@@ -313,17 +442,29 @@ async def test_page():
             }};
             
             ws.onmessage = function(event) {{
-                const message = JSON.parse(event.data);
+                const raw = typeof event.data === 'string'
+                    ? event.data
+                    : new TextDecoder().decode(event.data);
+                const parsed = JSON.parse(raw);
+                // The server coalesces signaling bursts into one array frame
+                if (Array.isArray(parsed)) {{
+                    parsed.forEach(handleServerMessage);
+                }} else {{
+                    handleServerMessage(parsed);
+                }}
+            }};
+
+            function handleServerMessage(message) {{
                 log(`Received: ${{JSON.stringify(message).substring(0, 100)}}...`);
-                
+
                 if (message.type === 'device_assigned') {{
                     myDeviceId = message.device_id;
                     document.getElementById('deviceIdValue').textContent = myDeviceId;
                     document.getElementById('deviceId').style.display = 'block';
                     log(`Assigned device ID: ${{myDeviceId}}`);
                 }} else if (message.type === 'devices_updated') {{
-                    connectedClients = message.other_clients || [];
-                    updateReceiverSelect(message.other_devices || message.devices);
+                    connectedClients = (message.clients || []).filter(id => id !== clientId);
+                    updateReceiverSelect(message.devices || {{}});
                 }} else if (message.type === 'incoming_transfer') {{
                     handleIncomingWebSocketTransfer(message);
                 }} else if (message.type === 'file_chunk') {{
@@ -336,9 +477,11 @@ async def test_page():
                     handleWebRTCAnswer(message);
                 }} else if (message.type === 'webrtc_ice_candidate') {{
                     handleWebRTCIceCandidate(message);
+                }} else if (message.type === 'webrtc_ice_candidates') {{
+                    handleWebRTCIceCandidates(message);
                 }}
-            }};
-            
+            }}
+
             ws.onclose = function(event) {{
                 document.getElementById('status').textContent = 'Disconnected';
                 document.getElementById('status').className = 'status disconnected';
@@ -369,6 +512,13 @@ async def test_page():
         function clearMessages() {{
             document.getElementById('messages').innerHTML = '';
         }}
+
+        function showSuccessBanner(html) {{
+            const banner = document.createElement('div');
+            banner.className = 'success-banner';
+            banner.innerHTML = html;
+            document.getElementById('messages').appendChild(banner);
+        }}
         
         function selectFile() {{
             const fileInput = document.getElementById('fileInput');
@@ -384,6 +534,15 @@ async def test_page():
             }}
         }}
         
+        function isCompressibleType(mimeType) {{
+            // Media/archive formats are already compressed - running
+            // permessage-deflate over their base64 is pure CPU waste.
+            // Only text-like payloads benefit from compression.
+            if (!mimeType) return false;
+            return /^text\\//.test(mimeType) ||
+                   /json|xml|javascript|svg/.test(mimeType);
+        }}
+
         function formatFileSize(bytes) {{
             if (bytes === 0) return '0 Bytes';
             const k = 1024;
@@ -447,6 +606,8 @@ async def test_page():
                 startTime: Date.now(),
                 method: 'webrtc'
             }};
+            // Lock the object shape so per-chunk property writes stay monomorphic
+            Object.preventExtensions(currentTransfer);
             
             // Create peer connection with enhanced config
             peerConnection = new RTCPeerConnection(rtcConfiguration);
@@ -472,13 +633,7 @@ async def test_page():
             
             // Rest of WebRTC setup...
             peerConnection.onicecandidate = (event) => {{
-                if (event.candidate) {{
-                    ws.send(JSON.stringify({{
-                        type: 'webrtc_ice_candidate',
-                        receiver_id: receiverId,
-                        candidate: event.candidate
-                    }}));
-                }}
+                queueIceCandidate(event.candidate, {{ receiver_id: receiverId }});
             }};
             
             peerConnection.onconnectionstatechange = () => {{
@@ -538,6 +693,7 @@ async def test_page():
                 method: 'websocket-chunked',
                 startTime: Date.now()
             }};
+            Object.preventExtensions(currentTransfer);
             
             // Send metadata first
             ws.send(JSON.stringify({{
@@ -547,7 +703,8 @@ async def test_page():
                     size: file.size,
                     type: file.type,
                     total_chunks: currentTransfer.totalChunks,
-                    chunk_size: CHUNK_SIZE
+                    chunk_size: CHUNK_SIZE,
+                    compress: isCompressibleType(file.type)
                 }},
                 receiver_id: receiverId
             }}));
@@ -560,8 +717,11 @@ async def test_page():
             const file = currentTransfer.file;
             const chunkSize = currentTransfer.chunkSize;
             const totalChunks = currentTransfer.totalChunks;
-            
-            for (let i = currentTransfer.sentChunks; i < totalChunks; i++) {{
+            // Keep the hot-loop counter in a local; write it back to
+            // currentTransfer once per outcome instead of per chunk.
+            let sent = currentTransfer.sentChunks;
+
+            for (let i = sent; i < totalChunks; i++) {{
                 if (!ws || ws.readyState !== WebSocket.OPEN) {{
                     log('Connection lost - save progress for resume');
                     break;
@@ -585,12 +745,12 @@ async def test_page():
                         checksum: i // Simple index as checksum for now
                     }}));
                     
-                    currentTransfer.sentChunks++;
-                    
+                    sent++;
+
                     // Update progress
-                    const progress = (currentTransfer.sentChunks / totalChunks) * 100;
+                    const progress = (sent / totalChunks) * 100;
                     const elapsed = (Date.now() - currentTransfer.startTime) / 1000;
-                    const speed = (currentTransfer.sentChunks * chunkSize) / elapsed / 1024 / 1024; // MB/s
+                    const speed = (sent * chunkSize) / elapsed / 1024 / 1024; // MB/s
                     
                     document.getElementById('senderProgress').style.width = progress + '%';
                     document.getElementById('senderPercent').textContent = `${{progress.toFixed(1)}}% @ ${{speed.toFixed(1)}} MB/s`;
@@ -609,17 +769,15 @@ async def test_page():
                     break;
                 }}
             }}
-            
-            if (currentTransfer.sentChunks === totalChunks) {{
+            currentTransfer.sentChunks = sent;
+
+            if (sent === totalChunks) {{
                 log('✅ FILE SENT SUCCESSFULLY!');
                 document.getElementById('transferStatus').textContent = '✅ Sent Successfully!';
                 document.getElementById('transferStatus').style.color = '#155724';
-                
-                const successMsg = document.createElement('div');
-                successMsg.style.cssText = 'background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em;';
+
                 const elapsed = ((Date.now() - currentTransfer.startTime) / 1000).toFixed(1);
-                successMsg.innerHTML = `✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})<br>Time: ${{elapsed}}s - Method: ${{currentTransfer.method}}`;
-                document.getElementById('messages').appendChild(successMsg);
+                showSuccessBanner(`✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})<br>Time: ${{elapsed}}s - Method: ${{currentTransfer.method}}`);
             }}
         }}
         
@@ -635,6 +793,7 @@ async def test_page():
                 sentChunks: 0,
                 method: 'websocket'
             }};
+            Object.preventExtensions(currentTransfer);
             
             // Send transfer start message
             ws.send(JSON.stringify({{
@@ -642,7 +801,8 @@ async def test_page():
                 file_info: {{
                     name: selectedFile.name,
                     size: selectedFile.size,
-                    type: selectedFile.type
+                    type: selectedFile.type,
+                    compress: isCompressibleType(selectedFile.type)
                 }},
                 receiver_id: receiverId
             }}));
@@ -660,7 +820,8 @@ async def test_page():
             const file = currentTransfer.file;
             const chunkSize = currentTransfer.chunkSize;
             const totalChunks = currentTransfer.totalChunks;
-            
+            let sent = 0;
+
             for (let i = 0; i < totalChunks; i++) {{
                 if (!ws || ws.readyState !== WebSocket.OPEN) {{
                     log('Connection lost during transfer');
@@ -688,13 +849,13 @@ async def test_page():
                         receiver_id: currentTransfer.receiverId
                     }}));
                     
-                    currentTransfer.sentChunks++;
-                    
+                    sent++;
+
                     // Update progress
-                    const progress = (currentTransfer.sentChunks / totalChunks) * 100;
+                    const progress = (sent / totalChunks) * 100;
                     document.getElementById('senderProgress').style.width = progress + '%';
                     document.getElementById('senderPercent').textContent = progress.toFixed(1) + '%';
-                    
+
                     if (i % 10 === 0 || i === totalChunks - 1) {{
                         log(`WebSocket progress: ${{progress.toFixed(1)}}%`);
                     }}
@@ -707,86 +868,145 @@ async def test_page():
                 await new Promise(resolve => setTimeout(resolve, 20));
             }}
             
-            if (currentTransfer.sentChunks === totalChunks) {{
+            currentTransfer.sentChunks = sent;
+
+            if (sent === totalChunks) {{
                 log('✅ FILE SENT SUCCESSFULLY!');
                 document.getElementById('transferStatus').textContent = '✅ Sent Successfully!';
                 document.getElementById('transferStatus').style.color = '#155724';
                 document.getElementById('transferStatus').style.fontWeight = 'bold';
-                
+
                 // Show success message
-                const successMsg = document.createElement('div');
-                successMsg.style.cssText = 'background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em;';
-                successMsg.innerHTML = `✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})<br>(via WebSocket)`;
-                document.getElementById('messages').appendChild(successMsg);
+                showSuccessBanner(`✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})<br>(via WebSocket)`);
             }}
         }}
         
         
+        // Base64 decode worker: decodes each chunk into a preallocated buffer
+        // off the main thread, then transfers the finished buffer back with
+        // zero copy. Keeps the UI responsive during reconstruction.
+        let decodeWorker = null;
+        const decodeWorkerSrc = `
+            let out = null, received = 0, total = 0, chunkSize = 0;
+            onmessage = (e) => {{
+                const m = e.data;
+                if (m.type === 'init') {{
+                    out = new Uint8Array(m.size);
+                    total = m.totalChunks;
+                    chunkSize = m.chunkSize;
+                    received = 0;
+                }} else if (m.type === 'chunk') {{
+                    const decoded = atob(m.b64);
+                    const offset = m.i * chunkSize;
+                    const len = decoded.length;
+                    for (let j = 0; j < len; j++) {{
+                        out[offset + j] = decoded.charCodeAt(j);
+                    }}
+                    received++;
+                    if (received === total) {{
+                        postMessage(out.buffer, [out.buffer]);
+                        out = null;
+                    }}
+                }}
+            }};
+        `;
+
         function handleIncomingWebSocketTransfer(message) {{
             const fileInfo = message.file_info;
             const senderId = message.sender_id;
-            
+
             log(`Incoming WebSocket transfer from ${{senderId}}: ${{fileInfo.name}}`);
-            
+
             // Show progress panel
             document.getElementById('transferProgress').style.display = 'block';
             document.getElementById('transferStatus').textContent = `Receiving ${{fileInfo.name}} via WebSocket...`;
-            
+
+            const totalChunks = Math.ceil(fileInfo.size / (32 * 1024));
             currentTransfer = {{
                 fileInfo: fileInfo,
                 senderId: senderId,
                 receivedChunks: 0,
-                totalChunks: Math.ceil(fileInfo.size / (32 * 1024)),
-                chunks: [],
+                totalChunks: totalChunks,
+                // Preallocate and fill so the array stays packed; assigning
+                // into an empty [] by index makes it holey and slower to scan.
+                // Only used on the no-Worker fallback path.
+                chunks: new Array(totalChunks).fill(null),
                 method: 'websocket'
             }};
+            Object.preventExtensions(currentTransfer);
+
+            if (window.Worker) {{
+                decodeWorker = new Worker(URL.createObjectURL(
+                    new Blob([decodeWorkerSrc], {{ type: 'application/javascript' }})));
+                decodeWorker.onmessage = (e) => {{
+                    const blob = new Blob([e.data], {{ type: fileInfo.type || 'application/octet-stream' }});
+                    decodeWorker.terminate();
+                    decodeWorker = null;
+                    finishWebSocketReceive(blob);
+                }};
+                decodeWorker.postMessage({{
+                    type: 'init',
+                    size: fileInfo.size,
+                    totalChunks: totalChunks,
+                    chunkSize: 32 * 1024
+                }});
+            }}
         }}
-        
+
         function handleWebSocketChunk(message) {{
             if (!currentTransfer || currentTransfer.method !== 'websocket') return;
-            
+
             const chunkData = message.chunk_data;
             const chunkIndex = message.chunk_index;
-            
-            // Store chunk
-            currentTransfer.chunks[chunkIndex] = chunkData;
+
+            if (decodeWorker) {{
+                // Hand the base64 straight to the worker; decoding happens
+                // concurrently while more chunks arrive.
+                decodeWorker.postMessage({{ type: 'chunk', i: chunkIndex, b64: chunkData }});
+            }} else {{
+                currentTransfer.chunks[chunkIndex] = chunkData;
+            }}
             currentTransfer.receivedChunks++;
-            
+
             // Update progress
             const progress = (currentTransfer.receivedChunks / currentTransfer.totalChunks) * 100;
             document.getElementById('receiverProgress').style.width = progress + '%';
             document.getElementById('receiverPercent').textContent = progress.toFixed(1) + '%';
-            
+
             if (progress < 100) {{
                 document.getElementById('transferStatus').textContent = `Receiving: ${{progress.toFixed(1)}}%`;
             }}
-            
-            // Check if complete
-            if (currentTransfer.receivedChunks === currentTransfer.totalChunks) {{
+
+            // Check if complete (worker path finishes via its onmessage)
+            if (!decodeWorker && currentTransfer.receivedChunks === currentTransfer.totalChunks) {{
                 reconstructWebSocketFile();
             }}
         }}
         
         function reconstructWebSocketFile() {{
             if (!currentTransfer || !currentTransfer.chunks) return;
-            
-            // Combine all base64 chunks
-            let fullBase64 = '';
-            for (let i = 0; i < currentTransfer.chunks.length; i++) {{
-                if (currentTransfer.chunks[i]) {{
-                    fullBase64 += currentTransfer.chunks[i];
+
+            // Decode each base64 chunk straight into one preallocated buffer.
+            // Avoids the O(n^2) string concatenation of building the full
+            // base64 string with += before a single giant atob().
+            const chunks = currentTransfer.chunks;
+            const n = chunks.length;
+            const byteArray = new Uint8Array(currentTransfer.fileInfo.size);
+            let offset = 0;
+            for (let i = 0; i < n; i++) {{
+                if (!chunks[i]) continue;
+                const decoded = atob(chunks[i]);
+                const len = decoded.length;
+                for (let j = 0; j < len; j++) {{
+                    byteArray[offset + j] = decoded.charCodeAt(j);
                 }}
+                offset += len;
             }}
-            
-            // Convert base64 to blob
-            const byteCharacters = atob(fullBase64);
-            const byteNumbers = new Array(byteCharacters.length);
-            for (let i = 0; i < byteCharacters.length; i++) {{
-                byteNumbers[i] = byteCharacters.charCodeAt(i);
-            }}
-            const byteArray = new Uint8Array(byteNumbers);
             const blob = new Blob([byteArray], {{ type: currentTransfer.fileInfo.type || 'application/octet-stream' }});
-            
+            finishWebSocketReceive(blob);
+        }}
+
+        function finishWebSocketReceive(blob) {{
             // Trigger download
             const url = URL.createObjectURL(blob);
             const a = document.createElement('a');
@@ -803,10 +1023,7 @@ async def test_page():
             document.getElementById('transferStatus').style.fontWeight = 'bold';
             
             // Show success message
-            const successMsg = document.createElement('div');
-            successMsg.style.cssText = 'background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em;';
-            successMsg.innerHTML = `✅ FILE RECEIVED SUCCESSFULLY!<br>${{currentTransfer.fileInfo.name}} (${{formatFileSize(currentTransfer.fileInfo.size)}})<br>(via WebSocket)<br>File has been downloaded to your Downloads folder`;
-            document.getElementById('messages').appendChild(successMsg);
+            showSuccessBanner(`✅ FILE RECEIVED SUCCESSFULLY!<br>${{currentTransfer.fileInfo.name}} (${{formatFileSize(currentTransfer.fileInfo.size)}})<br>(via WebSocket)<br>File has been downloaded to your Downloads folder`);
         }}
         
         function startWebRTCTransfer(receiverId) {{
@@ -819,6 +1036,7 @@ async def test_page():
                 totalChunks: Math.ceil(selectedFile.size / (16 * 1024)),
                 sentChunks: 0
             }};
+            Object.preventExtensions(currentTransfer);
             
             // Create peer connection
             peerConnection = new RTCPeerConnection(rtcConfiguration);
@@ -833,13 +1051,7 @@ async def test_page():
             
             // Handle ICE candidates
             peerConnection.onicecandidate = (event) => {{
-                if (event.candidate) {{
-                    ws.send(JSON.stringify({{
-                        type: 'webrtc_ice_candidate',
-                        receiver_id: receiverId,
-                        candidate: event.candidate
-                    }}));
-                }}
+                queueIceCandidate(event.candidate, {{ receiver_id: receiverId }});
             }};
             
             // Handle connection state
@@ -887,6 +1099,7 @@ async def test_page():
         }}
         
         function setupDataChannelHandlers(isSender, connectionTimeout) {{
+            dataChannel.binaryType = 'arraybuffer';
             dataChannel.onopen = () => {{
                 log('✅ Data channel opened successfully!');
                 isChannelReady = true;
@@ -940,22 +1153,34 @@ async def test_page():
             document.getElementById('transferStatus').textContent = 'Sending file...';
             
             try {{
-                // Send metadata first
-                const metadata = JSON.stringify({{
-                    type: 'file_metadata',
+                // Send metadata first as a tagged binary frame
+                const metaBytes = new TextEncoder().encode(JSON.stringify({{
                     name: file.name,
                     size: file.size,
                     totalChunks: totalChunks
-                }});
-                
+                }}));
+                const metaFrame = new ArrayBuffer(4 + metaBytes.byteLength);
+                new DataView(metaFrame).setUint32(0, FRAME_META, true);
+                new Uint8Array(metaFrame, 4).set(metaBytes);
+
                 if (dataChannel.readyState === 'open') {{
-                    dataChannel.send(metadata);
+                    dataChannel.send(metaFrame);
                     log('Metadata sent');
                 }} else {{
                     log(`❌ Cannot send metadata - channel state: ${{dataChannel.readyState}}`);
                     return;
                 }}
                 
+                // One reusable frame buffer for the whole send: send()
+                // snapshots the bytes synchronously, so the scratch can be
+                // overwritten on the next iteration instead of allocating a
+                // fresh ArrayBuffer per chunk.
+                const scratch = new Uint8Array(12 + chunkSize);
+                const scratchHdr = new Uint32Array(scratch.buffer, 0, 3);
+                scratchHdr[0] = FRAME_CHUNK;
+
+                let sent = 0;
+
                 // Send chunks with proper throttling
                 for (let i = 0; i < totalChunks; i++) {{
                     // Check channel state before each chunk
@@ -974,22 +1199,17 @@ async def test_page():
                     const chunk = file.slice(start, end);
                     const arrayBuffer = await chunk.arrayBuffer();
                     
-                    // Create chunk with header
-                    const header = new ArrayBuffer(8);
-                    const headerView = new DataView(header);
-                    headerView.setUint32(0, i, true); // chunk index
-                    headerView.setUint32(4, arrayBuffer.byteLength, true); // chunk size
-                    
-                    // Combine header and data
-                    const message = new ArrayBuffer(8 + arrayBuffer.byteLength);
-                    new Uint8Array(message, 0, 8).set(new Uint8Array(header));
-                    new Uint8Array(message, 8).set(new Uint8Array(arrayBuffer));
-                    
-                    dataChannel.send(message);
-                    currentTransfer.sentChunks++;
-                    
+                    // Fill the scratch frame: [tag][index][size] header + payload
+                    const len = arrayBuffer.byteLength;
+                    scratchHdr[1] = i; // chunk index
+                    scratchHdr[2] = len; // chunk size
+                    scratch.set(new Uint8Array(arrayBuffer), 12);
+
+                    dataChannel.send(len === chunkSize ? scratch : scratch.subarray(0, 12 + len));
+                    sent++;
+
                     // Update progress
-                    const progress = (currentTransfer.sentChunks / totalChunks) * 100;
+                    const progress = (sent / totalChunks) * 100;
                     document.getElementById('senderProgress').style.width = progress + '%';
                     document.getElementById('senderPercent').textContent = progress.toFixed(1) + '%';
                     
@@ -1000,21 +1220,21 @@ async def test_page():
                     // Small delay between chunks
                     await new Promise(resolve => setTimeout(resolve, 5));
                 }}
-                
+                currentTransfer.sentChunks = sent;
+
                 // Send completion signal with proper error handling
                 if (dataChannel && dataChannel.readyState === 'open') {{
                     try {{
-                        dataChannel.send(JSON.stringify({{ type: 'transfer_complete' }}));
+                        const doneFrame = new ArrayBuffer(4);
+                        new DataView(doneFrame).setUint32(0, FRAME_COMPLETE, true);
+                        dataChannel.send(doneFrame);
                         log('✅ FILE SENT SUCCESSFULLY!');
                         document.getElementById('transferStatus').textContent = '✅ Sent Successfully!';
                         document.getElementById('transferStatus').style.color = '#155724';
                         document.getElementById('transferStatus').style.fontWeight = 'bold';
                         
                         // Show success message prominently
-                        const successMsg = document.createElement('div');
-                        successMsg.style.cssText = 'background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em;';
-                        successMsg.innerHTML = `✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})`;
-                        document.getElementById('messages').appendChild(successMsg);
+                        showSuccessBanner(`✅ FILE SENT SUCCESSFULLY!<br>${{currentTransfer.file.name}} (${{formatFileSize(currentTransfer.file.size)}})`);
                         
                         // Clean up after successful transfer
                         setTimeout(() => {{
@@ -1043,42 +1263,52 @@ async def test_page():
         }}
         
         function handleIncomingData(data) {{
-            // Handle incoming file chunks (receiver side)
-            if (typeof data === 'string') {{
-                const message = JSON.parse(data);
-                if (message.type === 'file_metadata') {{
+            // Handle incoming frames (receiver side). Every frame carries a
+            // leading u32 tag, so the hot chunk path has no typeof check and
+            // no JSON.parse.
+            // Read the header through a Uint32Array view instead of a
+            // DataView: no per-field endian branch, and every browser target
+            // is little-endian, matching the sender's setUint32(..., true).
+            const tag = new Uint32Array(data, 0, 1)[0];
+
+            switch (tag) {{
+                case FRAME_META: {{
+                    const message = JSON.parse(new TextDecoder().decode(new Uint8Array(data, 4)));
                     log(`Receiving file: ${{message.name}}`);
                     document.getElementById('transferProgress').style.display = 'block';
                     document.getElementById('transferStatus').textContent = `Receiving: ${{message.name}}`;
                     currentTransfer = {{
                         fileInfo: message,
-                        chunks: [],
+                        chunks: new Array(message.totalChunks).fill(null),
                         receivedChunks: 0
                     }};
-                }} else if (message.type === 'transfer_complete') {{
-                    log('Transfer complete signal received from sender');
-                    reconstructFile();
+                    Object.preventExtensions(currentTransfer);
+                    break;
                 }}
-            }} else {{
-                // Binary data (file chunk)
-                if (currentTransfer) {{
-                    const view = new DataView(data);
-                    const chunkIndex = view.getUint32(0, true);
-                    const chunkSize = view.getUint32(4, true);
-                    const chunkData = new Uint8Array(data, 8, chunkSize);
-                    
-                    currentTransfer.chunks[chunkIndex] = chunkData;
+                case FRAME_CHUNK: {{
+                    if (!currentTransfer) break;
+                    const hdr = new Uint32Array(data, 0, 3);
+                    const chunkIndex = hdr[1];
+                    const chunkSize = hdr[2];
+
+                    // Alias the received buffer directly - no copy of the payload
+                    currentTransfer.chunks[chunkIndex] = new Uint8Array(data, 12, chunkSize);
                     currentTransfer.receivedChunks++;
-                    
+
                     const progress = (currentTransfer.receivedChunks / currentTransfer.fileInfo.totalChunks) * 100;
                     document.getElementById('receiverProgress').style.width = progress + '%';
                     document.getElementById('receiverPercent').textContent = progress.toFixed(1) + '%';
-                    
+
                     // Update status while receiving
                     if (progress < 100) {{
                         document.getElementById('transferStatus').textContent = `Receiving: ${{progress.toFixed(1)}}%`;
                     }}
+                    break;
                 }}
+                case FRAME_COMPLETE:
+                    log('Transfer complete signal received from sender');
+                    reconstructFile();
+                    break;
             }}
         }}
         
@@ -1116,10 +1346,7 @@ async def test_page():
             document.getElementById('transferStatus').style.fontWeight = 'bold';
             
             // Show success message prominently
-            const successMsg = document.createElement('div');
-            successMsg.style.cssText = 'background: #d4edda; color: #155724; padding: 15px; margin: 10px 0; border-radius: 8px; font-weight: bold; text-align: center; font-size: 1.2em;';
-            successMsg.innerHTML = `✅ FILE RECEIVED SUCCESSFULLY!<br>${{currentTransfer.fileInfo.name}} (${{formatFileSize(currentTransfer.fileInfo.size)}})<br>File has been downloaded to your Downloads folder`;
-            document.getElementById('messages').appendChild(successMsg);
+            showSuccessBanner(`✅ FILE RECEIVED SUCCESSFULLY!<br>${{currentTransfer.fileInfo.name}} (${{formatFileSize(currentTransfer.fileInfo.size)}})<br>File has been downloaded to your Downloads folder`);
             
             // Clean up after successful reception
             setTimeout(() => {{
@@ -1148,13 +1375,7 @@ async def test_page():
             
             // Handle ICE candidates
             peerConnection.onicecandidate = (event) => {{
-                if (event.candidate) {{
-                    ws.send(JSON.stringify({{
-                        type: 'webrtc_ice_candidate',
-                        sender_id: senderId,
-                        candidate: event.candidate
-                    }}));
-                }}
+                queueIceCandidate(event.candidate, {{ sender_id: senderId }});
             }};
             
             // Set remote description and create answer
@@ -1222,10 +1443,18 @@ async def test_page():
                 .catch(error => log(`Error adding ICE candidate: ${{error.message}}`));
         }}
         
+        function handleWebRTCIceCandidates(message) {{
+            (message.candidates || []).forEach(candidate => {{
+                handleWebRTCIceCandidate({{ candidate: candidate }});
+            }});
+        }}
+
         function cleanupWebRTC() {{
             isChannelReady = false;
             isRemoteDescriptionSet = false;
             pendingIceCandidates = [];
+            iceBatch = [];
+            if (iceTimer) {{ clearTimeout(iceTimer); iceTimer = null; }}
             if (dataChannel) {{
                 dataChannel.close();
                 dataChannel = null;
@@ -1277,7 +1506,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
     # Send device ID to the client
     device_id = manager.device_ids.get(client_id)
     if device_id:
-        await websocket.send_text(json.dumps({
+        await websocket.send_text(_dumps({
             "type": "device_assigned",
             "device_id": device_id
         }))
@@ -1295,19 +1524,18 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
             
             if message_type == "ping":
                 # Respond to ping
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(_dumps({
                     "type": "pong",
                     "timestamp": message.get("timestamp"),
                     "server_time": datetime.now().isoformat()
                 }))
             
             elif message_type == "get_stats":
-                await websocket.send_text(json.dumps({
+                await websocket.send_text(_dumps({
                     "type": "stats",
                     "total_connections": len(manager.active_connections),
                     "clients": list(manager.active_connections.keys()),
-                    "devices": {cid: manager.device_ids.get(cid, "Unknown") 
-                              for cid in manager.active_connections.keys()}
+                    "devices": dict(manager.device_ids)
                 }))
             
             # WebRTC Signaling
@@ -1317,12 +1545,12 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 file_info = message.get("file_info")
                 
                 if receiver_id and receiver_id in manager.active_connections:
-                    await manager.send_to_client(receiver_id, json.dumps({
+                    manager.queue_to_client(receiver_id, {
                         "type": "webrtc_offer",
                         "sender_id": client_id,
                         "offer": offer,
                         "file_info": file_info
-                    }))
+                    })
                     logger.info(f"Forwarded WebRTC offer from {client_id} to {receiver_id}")
             
             elif message_type == "webrtc_answer":
@@ -1330,11 +1558,11 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 answer = message.get("answer")
                 
                 if sender_id and sender_id in manager.active_connections:
-                    await manager.send_to_client(sender_id, json.dumps({
+                    manager.queue_to_client(sender_id, {
                         "type": "webrtc_answer",
                         "receiver_id": client_id,
                         "answer": answer
-                    }))
+                    })
                     logger.info(f"Forwarded WebRTC answer from {client_id} to {sender_id}")
             
             elif message_type == "webrtc_ice_candidate":
@@ -1345,14 +1573,30 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 
                 target_id = receiver_id or sender_id
                 if target_id and target_id in manager.active_connections:
-                    await manager.send_to_client(target_id, json.dumps({
+                    manager.queue_to_client(target_id, {
                         "type": "webrtc_ice_candidate",
                         "sender_id": client_id if receiver_id else None,
                         "receiver_id": client_id if sender_id else None,
                         "candidate": candidate
-                    }))
+                    })
                     logger.info(f"Forwarded ICE candidate from {client_id} to {target_id}")
-    
+
+            elif message_type == "webrtc_ice_candidates":
+                # Batched variant: one frame carrying the whole gathering burst
+                receiver_id = message.get("receiver_id")
+                sender_id = message.get("sender_id")
+                candidates = message.get("candidates") or []
+
+                target_id = receiver_id or sender_id
+                if target_id and target_id in manager.active_connections:
+                    manager.queue_to_client(target_id, {
+                        "type": "webrtc_ice_candidates",
+                        "sender_id": client_id if receiver_id else None,
+                        "receiver_id": client_id if sender_id else None,
+                        "candidates": candidates
+                    })
+                    logger.info(f"Forwarded {len(candidates)} ICE candidates from {client_id} to {target_id}")
+
     except WebSocketDisconnect:
         manager.disconnect(client_id)
         await manager.broadcast_device_list_update()
@@ -1370,12 +1614,18 @@ if __name__ == "__main__":
     print("Test Page: http://localhost:8003/test")
     print("Stats: http://localhost:8003/stats")
     print("=" * 70)
+    # WEB_CONCURRENCY > 1 needs an import-string app; keep it at 1 until
+    # signaling state (ConnectionManager) moves out of process, since two
+    # peers landing on different workers could not reach each other
     uvicorn.run(
-        app,
+        "debug_server_mobile:app",
         host="0.0.0.0",
         port=8007,
         log_level="info",
+        loop="uvloop",
+        http="httptools",
         ws_ping_interval=20,
         ws_ping_timeout=10,
-        timeout_keep_alive=75
+        timeout_keep_alive=75,
+        workers=int(os.environ.get("WEB_CONCURRENCY", "1"))
     )
@@ -5,10 +5,11 @@ Robust alternative to WebSocket-based transfers using HTTP chunked streaming
 """
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Response
-from fastapi.responses import StreamingResponse, HTMLResponse
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import json
+import time
 import uuid
 import asyncio
 from datetime import datetime
@@ -16,8 +17,26 @@ from typing import Dict, Optional
 import aiofiles
 import hashlib
 import mimetypes
+import orjson
+import secrets
+import zstandard
 
-app = FastAPI(title="ShareZidi v3.0 - HTTP Streaming Server")
+# BLAKE3 tree-hashes at multiple GB/s per core; fall back to blake2b so
+# integrity digests still work where the wheel is unavailable
+try:
+    from blake3 import blake3 as _chunk_hasher
+except ImportError:
+    from hashlib import blake2b as _chunk_hasher
+
+# 26 letters padded to 32 so a 5-bit slice maps straight to a character
+_DEVICE_ID_ALPHA = "ABCDEFGHIJKLMNOPQRSTUVWXYZABCDEF"
+
+# orjson for all JSON responses - stdlib json encoding is the dominant
+# per-response cost on the chunk-upload and status-poll endpoints
+app = FastAPI(
+    title="ShareZidi v3.0 - HTTP Streaming Server",
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -36,6 +55,18 @@ transfer_metadata: Dict[str, Dict] = {}
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Must match the chunkSize used by the JS uploader in /test
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Preallocation cap: file_info["size"] is client-supplied, so an
+# unauthenticated /transfer/start must not be able to fallocate
+# arbitrary gigabytes; larger files simply grow past the hint
+PREALLOC_MAX = 1 << 30
+
+# Transfers that never receive a chunk are evicted after this grace
+# window so the fd and preallocated file don't leak forever
+ABANDONED_GRACE_S = 60.0
+
 class TransferManager:
     def __init__(self):
         self.transfers = {}
@@ -43,16 +74,25 @@ class TransferManager:
     
     def generate_device_id(self):
         """Generate unique device ID like 149-XCABCD"""
-        import random
-        numbers = ''.join(random.choices('0123456789', k=3))
-        letters = ''.join(random.choices('ABCDEFGHIJKLMNOPQRSTUVWXYZ', k=5))
-        return f"{numbers}-{letters}"
+        # Single CSPRNG draw instead of two random.choices list+join rounds;
+        # IDs are handles shared with untrusted peers so they must not be
+        # guessable. Alphabet padded to 32 entries for a rejection-free
+        # 5-bit lookup.
+        while True:
+            r = secrets.randbits(40)
+            n = r % 1000
+            r //= 1000
+            letters = ''.join(_DEVICE_ID_ALPHA[(r >> (5 * i)) & 31] for i in range(5))
+            device_id = f"{n:03d}-{letters}"
+            if device_id not in self.device_ids:
+                return device_id
     
     def register_device(self, device_id: str, client_info: Dict):
         """Register a new device"""
         self.device_ids[device_id] = {
             "id": device_id,
-            "connected_at": datetime.now().isoformat(),
+            # Raw nanosecond timestamp; ISO formatting is deferred to readers
+            "connected_at": time.time_ns(),
             "info": client_info
         }
         return device_id
@@ -64,30 +104,68 @@ class TransferManager:
     def start_transfer(self, sender_id: str, receiver_id: str, file_info: Dict):
         """Start a new file transfer"""
         transfer_id = str(uuid.uuid4())
+
+        # Open the destination once up front and preallocate it so every
+        # chunk is a single pwrite at its known offset instead of an
+        # open-append-close cycle per chunk
+        file_name = file_info.get("name", "unknown")
+        file_path = os.path.join(UPLOAD_DIR, f"{transfer_id}_{file_name}")
+        fd = os.open(file_path, os.O_CREAT | os.O_RDWR, 0o644)
+        file_size = int(file_info.get("size", 0) or 0)
+        if file_size > 0 and hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, min(file_size, PREALLOC_MAX))
+
         self.transfers[transfer_id] = {
             "id": transfer_id,
             "sender_id": sender_id,
             "receiver_id": receiver_id,
             "file_info": file_info,
             "status": "pending",
-            "created_at": datetime.now().isoformat(),
+            "created_at": time.time_ns(),
             "progress": 0,
             "chunks_sent": 0,
-            "total_chunks": 0
+            "total_chunks": 0,
+            "downloaded": 0,
+            "_fd": fd,
+            "_path": file_path,
+            # Wakes the SSE event stream whenever progress changes
+            "_event": asyncio.Event(),
+            # Incremental integrity hash fed as upload chunks arrive
+            "_hasher": _chunk_hasher()
         }
+        # Nothing else evicts transfers in this server, so reclaim the fd
+        # and the preallocated file if no chunk ever arrives
+        asyncio.get_running_loop().call_later(
+            ABANDONED_GRACE_S, self._evict_if_abandoned, transfer_id)
         return transfer_id
+
+    def _evict_if_abandoned(self, transfer_id: str):
+        """Drop a transfer that never saw an upload chunk."""
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None or transfer["chunks_sent"] > 0:
+            return
+        fd = transfer.get("_fd")
+        if fd is not None:
+            os.close(fd)
+        try:
+            os.unlink(transfer["_path"])
+        except OSError:
+            pass
+        del self.transfers[transfer_id]
     
     def update_transfer_progress(self, transfer_id: str, progress: float, chunks_sent: int):
         """Update transfer progress"""
         if transfer_id in self.transfers:
             self.transfers[transfer_id]["progress"] = progress
             self.transfers[transfer_id]["chunks_sent"] = chunks_sent
+            self.transfers[transfer_id]["_event"].set()
     
     def complete_transfer(self, transfer_id: str):
         """Mark transfer as completed"""
         if transfer_id in self.transfers:
             self.transfers[transfer_id]["status"] = "completed"
-            self.transfers[transfer_id]["completed_at"] = datetime.now().isoformat()
+            self.transfers[transfer_id]["completed_at"] = time.time_ns()
+            self.transfers[transfer_id]["_event"].set()
 
 transfer_manager = TransferManager()
 
@@ -149,25 +227,68 @@ async def upload_file_chunk(transfer_id: str, request: Request):
     chunk_index = int(request.headers.get("X-Chunk-Index", 0))
     total_chunks = int(request.headers.get("X-Total-Chunks", 1))
     file_name = request.headers.get("X-File-Name", "unknown")
-    
-    # Create file path
-    file_path = os.path.join(UPLOAD_DIR, f"{transfer_id}_{file_name}")
-    
+
     try:
-        # Append chunk to file
-        async with aiofiles.open(file_path, "ab") as f:
-            async for chunk in request.stream():
-                await f.write(chunk)
-        
-        # Update progress
+        # Write the chunk at its known offset through the preallocated fd
+        # opened at /transfer/start; pwrite lets chunks land out of order too
+        fd = transfer.get("_fd")
+        if fd is None:
+            file_path = os.path.join(UPLOAD_DIR, f"{transfer_id}_{file_name}")
+            fd = os.open(file_path, os.O_CREAT | os.O_RDWR, 0o644)
+            transfer["_fd"] = fd
+            transfer["_path"] = file_path
+
+        # Stream the body straight into one Content-Length-sized buffer
+        # instead of letting request.body() accumulate and join a list of
+        # TCP reads; the single pwrite below then coalesces in writeback
+        size = int(request.headers.get("content-length", 0) or 0)
+        if request.headers.get("content-encoding") == "zstd":
+            # Compressible uploads arrive zstd-framed to halve wire bytes;
+            # decompression runs at ~1 GB/s on one core, so it never
+            # becomes the bottleneck. Clients skip this for already-
+            # compressed types (media, archives)
+            # request.stream() yields a trailing empty chunk; feeding it
+            # to a finished decompressobj raises, so skip empty pieces
+            decompressor = zstandard.ZstdDecompressor().decompressobj()
+            pieces = [decompressor.decompress(piece)
+                      async for piece in request.stream() if piece]
+            body = b"".join(pieces)
+        elif size > 0:
+            buf = bytearray(size)
+            offset = 0
+            async for piece in request.stream():
+                buf[offset:offset + len(piece)] = piece
+                offset += len(piece)
+            body = memoryview(buf)[:offset]
+        else:
+            body = await request.body()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, os.pwrite, fd, body, chunk_index * UPLOAD_CHUNK_SIZE
+        )
+
+        # Chunks are uploaded in order, so the hash can be fed incrementally
+        transfer["_hasher"].update(body)
+
+        # Close the fd once the last chunk has landed
+        if chunk_index + 1 >= total_chunks:
+            os.close(fd)
+            transfer["_fd"] = None
+            transfer["digest"] = transfer["_hasher"].hexdigest()
+
+        # Update progress; total_chunks is only known once the sender
+        # starts uploading, and the receiver-progress math depends on it
+        transfer["total_chunks"] = total_chunks
         progress = ((chunk_index + 1) / total_chunks) * 100
         transfer_manager.update_transfer_progress(transfer_id, progress, chunk_index + 1)
-        
+
         return {
             "status": "chunk_received",
             "chunk_index": chunk_index,
             "progress": progress,
-            "transfer_id": transfer_id
+            "transfer_id": transfer_id,
+            # Present only on the final chunk so the sender can verify
+            "digest": transfer.get("digest")
         }
     
     except Exception as e:
@@ -181,7 +302,7 @@ async def download_file(transfer_id: str):
     
     transfer = transfer_manager.transfers[transfer_id]
     file_name = transfer["file_info"].get("name", "unknown")
-    file_path = os.path.join(UPLOAD_DIR, f"{transfer_id}_{file_name}")
+    file_path = transfer.get("_path") or os.path.join(UPLOAD_DIR, f"{transfer_id}_{file_name}")
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
@@ -191,20 +312,20 @@ async def download_file(transfer_id: str):
     
     async def generate_file_chunks():
         """Generator to stream file in chunks"""
-        chunk_size = 64 * 1024  # 64KB chunks
-        chunk_index = 0
+        chunk_size = 1024 * 1024  # 1MB reads amortize syscall + await overhead
         async with aiofiles.open(file_path, "rb") as f:
             while True:
                 chunk = await f.read(chunk_size)
                 if not chunk:
                     break
-                
-                # Track downloaded chunks for progress
-                if 'downloaded_chunks' not in transfer_manager.transfers[transfer_id]:
-                    transfer_manager.transfers[transfer_id]['downloaded_chunks'] = set()
-                transfer_manager.transfers[transfer_id]['downloaded_chunks'].add(chunk_index)
-                chunk_index += 1
-                
+
+                # Chunks stream out strictly in order, so a bare counter
+                # tracks progress without a set allocation per chunk.
+                # Counted in 64KB units to keep chunk-index semantics for
+                # clients that negotiated the upload chunk size.
+                transfer['downloaded'] += (len(chunk) + UPLOAD_CHUNK_SIZE - 1) // UPLOAD_CHUNK_SIZE
+                transfer['_event'].set()
+
                 yield chunk
     
     # Mark transfer as completed
@@ -227,22 +348,68 @@ async def get_transfer_status(transfer_id: str):
         raise HTTPException(status_code=404, detail="Transfer not found")
     
     transfer = transfer_manager.transfers[transfer_id]
-    
-    # Calculate receiver progress based on downloaded chunks
-    receiver_progress = 0
-    if 'downloaded_chunks' in transfer:
-        receiver_progress = len(transfer['downloaded_chunks'])
-    
-    return {
-        **transfer,
+
+    # Receiver progress is the count of chunks already streamed out
+    receiver_progress = transfer.get('downloaded', 0)
+
+    # The payload only changes when one of these ticks, so idle or paused
+    # transfers serve the memoized bytes and allocate nothing per poll
+    cache_key = (receiver_progress, transfer.get('chunks_sent', 0), transfer['status'])
+    cached = transfer.get('_cached_status')
+    if cached is not None and cached[0] == cache_key:
+        return Response(content=cached[1], media_type="application/json")
+
+    # Explicit orjson encoding: the JS client polls this endpoint, so skip
+    # the jsonable_encoder pass entirely on the hot path
+    payload = {
+        # Underscore-prefixed keys are server-side handles (fd, path), not
+        # part of the transfer record exposed to clients
+        **{k: v for k, v in transfer.items() if not k.startswith("_")},
         'receiver_progress': receiver_progress,
         'total_chunks': transfer.get('total_chunks', 0)
     }
+    # Timestamps live as time.time_ns() ints on the hot path; render ISO
+    # only here where a human-readable record is actually wanted
+    for key in ('created_at', 'completed_at'):
+        if isinstance(payload.get(key), int):
+            payload[key] = datetime.fromtimestamp(payload[key] / 1e9).isoformat()
+    body = orjson.dumps(payload)
+    transfer['_cached_status'] = (cache_key, body)
+    return Response(content=body, media_type="application/json")
 
-@app.get("/test", response_class=HTMLResponse)
-async def test_page():
-    """Test page for HTTP streaming file transfers"""
-    return """
+@app.get("/transfer/events/{transfer_id}")
+async def transfer_events(transfer_id: str):
+    """Push transfer progress over SSE, waking only when progress changes"""
+    if transfer_id not in transfer_manager.transfers:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+
+    transfer = transfer_manager.transfers[transfer_id]
+
+    async def event_stream():
+        # One event per actual progress change instead of a 1Hz poll; the
+        # generator is cancelled when the client closes the EventSource.
+        # clear() must precede the snapshot: a set() landing while the
+        # yield is suspended would otherwise be wiped before the wait and
+        # the client would miss that event (possibly the terminal one)
+        while True:
+            transfer['_event'].clear()
+            state = {
+                **{k: v for k, v in transfer.items() if not k.startswith("_")},
+                'receiver_progress': transfer.get('downloaded', 0),
+                'total_chunks': transfer.get('total_chunks', 0)
+            }
+            yield f"data: {orjson.dumps(state).decode()}\n\n"
+            await transfer['_event'].wait()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+# Static test page: encoded once at import time and served with a strong
+# ETag so repeat loads short-circuit to 304
+_TEST_HTML = ("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -329,7 +496,7 @@ async def test_page():
         let selectedFile = null;
         let currentTransfer = null;
         let devices = {};
-        let progressInterval = null;
+        let progressEvents = null;
         let isTransferring = false;
         
         function log(message) {
@@ -385,28 +552,55 @@ async def test_page():
             }
         }
         
+        // Keyed diff caches: only nodes whose device appeared or vanished
+        // are touched, instead of rebuilding the whole list every refresh
+        const _deviceNodes = new Map();
+        const _receiverOptions = new Map();
+
         function updateDeviceList() {
             const deviceList = document.getElementById('deviceList');
-            deviceList.innerHTML = '';
+            if (_deviceNodes.size === 0) {
+                deviceList.innerHTML = '';
+            }
+            for (const [id, node] of _deviceNodes) {
+                if (!(id in devices)) {
+                    node.remove();
+                    _deviceNodes.delete(id);
+                }
+            }
+            const frag = document.createDocumentFragment();
             Object.values(devices).forEach(device => {
+                if (_deviceNodes.has(device.id)) return;
                 const deviceDiv = document.createElement('div');
                 deviceDiv.className = 'device-item';
                 deviceDiv.textContent = `${device.id} (${device.info.timestamp})`;
-                deviceList.appendChild(deviceDiv);
+                _deviceNodes.set(device.id, deviceDiv);
+                frag.appendChild(deviceDiv);
             });
+            deviceList.appendChild(frag);
         }
-        
+
         function updateReceiverSelect() {
             const select = document.getElementById('receiverSelect');
-            select.innerHTML = '<option value="">Select Receiver...</option>';
-            Object.values(devices).forEach(device => {
-                if (device.id !== myDeviceId) {
-                    const option = document.createElement('option');
-                    option.value = device.id;
-                    option.textContent = device.id;
-                    select.appendChild(option);
+            if (_receiverOptions.size === 0) {
+                select.innerHTML = '<option value="">Select Receiver...</option>';
+            }
+            for (const [id, option] of _receiverOptions) {
+                if (!(id in devices) || id === myDeviceId) {
+                    option.remove();
+                    _receiverOptions.delete(id);
                 }
+            }
+            const frag = document.createDocumentFragment();
+            Object.values(devices).forEach(device => {
+                if (device.id === myDeviceId || _receiverOptions.has(device.id)) return;
+                const option = document.createElement('option');
+                option.value = device.id;
+                option.textContent = device.id;
+                _receiverOptions.set(device.id, option);
+                frag.appendChild(option);
             });
+            select.appendChild(frag);
         }
         
         function selectFile() {
@@ -483,32 +677,31 @@ async def test_page():
         }
         
         function startProgressPolling() {
-            if (progressInterval) {
-                clearInterval(progressInterval);
+            if (progressEvents) {
+                progressEvents.close();
             }
-            
-            progressInterval = setInterval(async () => {
-                if (!currentTransfer || !isTransferring) return;
-                
-                try {
-                    const response = await fetch(`/transfer/status/${currentTransfer}`);
-                    const status = await response.json();
-                    
-                    if (status.receiver_progress !== undefined) {
-                        const receiverProgress = (status.receiver_progress / status.total_chunks) * 100;
-                        document.getElementById('receiverProgress').style.width = receiverProgress + '%';
-                        document.getElementById('receiverPercent').textContent = receiverProgress.toFixed(1) + '%';
-                        
-                        if (status.receiver_progress >= status.total_chunks) {
-                            clearInterval(progressInterval);
-                            document.getElementById('transferStatus').textContent = 'Transfer completed successfully!';
-                            isTransferring = false;
-                        }
+
+            // Server pushes only when progress actually changes - no 1Hz polling
+            progressEvents = new EventSource(`/transfer/events/${currentTransfer}`);
+            progressEvents.onmessage = (event) => {
+                const status = JSON.parse(event.data);
+
+                if (status.receiver_progress !== undefined) {
+                    const receiverProgress = (status.receiver_progress / status.total_chunks) * 100;
+                    document.getElementById('receiverProgress').style.width = receiverProgress + '%';
+                    document.getElementById('receiverPercent').textContent = receiverProgress.toFixed(1) + '%';
+
+                    if (status.receiver_progress >= status.total_chunks && status.total_chunks > 0) {
+                        progressEvents.close();
+                        progressEvents = null;
+                        document.getElementById('transferStatus').textContent = 'Transfer completed successfully!';
+                        isTransferring = false;
                     }
-                } catch (error) {
-                    log(`Failed to get receiver progress: ${error.message}`);
                 }
-            }, 1000); // Poll every second
+            };
+            progressEvents.onerror = () => {
+                log('Progress event stream interrupted');
+            };
         }
         
         async function uploadFileInChunks(uploadUrl) {
@@ -559,9 +752,9 @@ async def test_page():
         
         function stopTransfer() {
             isTransferring = false;
-            if (progressInterval) {
-                clearInterval(progressInterval);
-                progressInterval = null;
+            if (progressEvents) {
+                progressEvents.close();
+                progressEvents = null;
             }
             document.getElementById('transferStatus').textContent = 'Transfer stopped by user';
             document.getElementById('stopBtn').disabled = true;
@@ -588,9 +781,9 @@ async def test_page():
                 document.getElementById('fileInput').value = '';
                 document.getElementById('fileInfo').style.display = 'none';
                 
-                if (progressInterval) {
-                    clearInterval(progressInterval);
-                    progressInterval = null;
+                if (progressEvents) {
+                    progressEvents.close();
+                    progressEvents = null;
                 }
                 
                 isTransferring = false;
@@ -613,7 +806,19 @@ async def test_page():
     </script>
 </body>
 </html>
-    """
+    """).encode()
+_TEST_ETAG = '"' + hashlib.blake2b(_TEST_HTML, digest_size=8).hexdigest() + '"'
+
+@app.get("/test")
+async def test_page(request: Request):
+    """Test page for HTTP streaming file transfers"""
+    if request.headers.get("if-none-match") == _TEST_ETAG:
+        return Response(status_code=304)
+    return Response(
+        content=_TEST_HTML,
+        media_type="text/html",
+        headers={"ETag": _TEST_ETAG, "Cache-Control": "public, max-age=3600"},
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -622,4 +827,19 @@ if __name__ == "__main__":
     print("Test page: http://localhost:8004/test")
     print("Devices: http://localhost:8004/devices")
     print("=" * 50)
-    uvicorn.run(app, host="127.0.0.1", port=8004, log_level="info")
+    # uvicorn[standard] pulls in uvloop + httptools; request the fast
+    # implementations explicitly (uvicorn falls back to asyncio/h11 on
+    # platforms where they are unavailable, e.g. uvloop on Windows)
+    #
+    # WEB_CONCURRENCY > 1 scales the GIL-bound upload path across cores,
+    # but transfer state lives in this process, so only raise it once
+    # clients pin a transfer to one worker (or state moves out of process)
+    uvicorn.run(
+        "http_streaming_server:app",
+        host="127.0.0.1",
+        port=8004,
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.environ.get("WEB_CONCURRENCY", "1")),
+    )
@@ -2,6 +2,8 @@
 Minimal FastAPI test
 """
 
+import os
+
 from fastapi import FastAPI
 
 app = FastAPI()
@@ -13,5 +15,7 @@ def read_root():
 if __name__ == "__main__":
     import uvicorn
     print("Starting minimal FastAPI server...")
-    uvicorn.run(app, host="127.0.0.1", port=8002)
+    uvicorn.run("minimal_test:app", host="127.0.0.1", port=8002,
+                loop="uvloop", http="httptools",
+                workers=int(os.environ.get("WEB_CONCURRENCY", "1")))
 
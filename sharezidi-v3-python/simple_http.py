@@ -3,40 +3,48 @@ Simple HTTP server for testing
 """
 
 import http.server
-import socketserver
 import webbrowser
 import threading
 import time
 
+# Encoded once at import so each request is a single buffer write
+_HTML_BYTES = ("""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>ShareZidi v3.0 - Python Server</title>
+</head>
+<body>
+    <h1>ShareZidi v3.0 - Python Server Running!</h1>
+    <p>Server is working correctly</p>
+    <p>Ready for P2P file transfer development</p>
+    <p>Next: Add WebRTC and FastAPI</p>
+</body>
+</html>
+""").encode()
+
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Content-Length + HTTP/1.1 enables keep-alive instead of a fresh TCP
+    # connection per request
+    protocol_version = "HTTP/1.1"
+
     def do_GET(self):
         if self.path == '/':
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
+            self.send_header('Content-Length', str(len(_HTML_BYTES)))
             self.end_headers()
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>ShareZidi v3.0 - Python Server</title>
-            </head>
-            <body>
-                <h1>ShareZidi v3.0 - Python Server Running!</h1>
-                <p>Server is working correctly</p>
-                <p>Ready for P2P file transfer development</p>
-                <p>Next: Add WebRTC and FastAPI</p>
-            </body>
-            </html>
-            """
-            self.wfile.write(html.encode())
+            self.wfile.write(_HTML_BYTES)
         else:
             super().do_GET()
 
 def run_server():
     PORT = 8000
     Handler = MyHTTPRequestHandler
-    
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+
+    # ThreadingHTTPServer handles connections concurrently; plain TCPServer
+    # serializes them, so one slow client blocks everyone
+    with http.server.ThreadingHTTPServer(("", PORT), Handler) as httpd:
         print(f"ShareZidi v3.0 Python Server running on port {PORT}")
         print(f"Open http://localhost:{PORT} in your browser")
         print("=" * 50)
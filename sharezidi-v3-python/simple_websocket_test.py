@@ -4,30 +4,69 @@ Clean, minimal test for WebSocket connection
 """
 
 from fastapi import FastAPI, WebSocket
-from fastapi.responses import HTMLResponse
-import json
+from fastapi.responses import ORJSONResponse, Response
+import asyncio
 import logging
+import os
+import sys
+
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="ShareZidi v3.0 - Simple WebSocket Test")
+# orjson serializes every JSON route in C with no per-route changes
+app = FastAPI(
+    title="ShareZidi v3.0 - Simple WebSocket Test",
+    default_response_class=ORJSONResponse,
+)
+
+class ClientState:
+    """Per-connection state; __slots__ keeps attribute access a C-level
+    offset lookup and drops the per-instance __dict__."""
+    __slots__ = ("ws", "queue", "relay", "last_ping", "idle_handle")
+
+    def __init__(self, ws, queue, relay):
+        self.ws = ws
+        self.queue = queue
+        self.relay = relay
+        self.last_ping = 0.0
+        self.idle_handle = None
+
+# Dead TCP peers otherwise sit in connections forever; checked with
+# loop.time() (a vDSO read, no allocation) on a call_later timer rather
+# than a per-connection polling task
+IDLE_CHECK_INTERVAL = 30.0
+IDLE_TIMEOUT = 60.0
 
 # Store connections
 connections = {}
 
+# Root payload only changes on connect/disconnect; cache the encoded bytes
+# and rebuild lazily instead of re-serializing per request
+_root_cache: bytes = b''
+_root_dirty = True
+
+def _mark_root_dirty():
+    global _root_dirty
+    _root_dirty = True
+
 @app.get("/")
 async def root():
-    return {
-        "message": "ShareZidi v3.0 - Simple WebSocket Test",
-        "status": "running",
-        "connections": len(connections)
-    }
+    global _root_cache, _root_dirty
+    if _root_dirty:
+        _root_cache = orjson.dumps({
+            "message": "ShareZidi v3.0 - Simple WebSocket Test",
+            "status": "running",
+            "connections": len(connections)
+        })
+        _root_dirty = False
+    return Response(content=_root_cache, media_type="application/json")
 
-@app.get("/test2", response_class=HTMLResponse)
-async def test2():
-    return """
+# Static test page: encoded once at import so the endpoint is a
+# near-zero-cost ASGI write instead of a per-request str + encode
+_TEST2_HTML = ("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -58,7 +97,9 @@ async def test2():
         
         // Use port 8005 to avoid conflicts
         const ws = new WebSocket(`ws://localhost:8005/ws/${clientId}`);
-        
+        ws.binaryType = 'arraybuffer';  // server replies with binary JSON frames
+        const decoder = new TextDecoder();
+
         ws.onopen = function(event) {
             document.getElementById('status').textContent = 'Connected!';
             document.getElementById('status').className = 'status connected';
@@ -67,7 +108,8 @@ async def test2():
         };
         
         ws.onmessage = function(event) {
-            const message = JSON.parse(event.data);
+            const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+            const message = JSON.parse(text);
             console.log('Received:', message);
             log('Received: ' + JSON.stringify(message));
         };
@@ -106,41 +148,124 @@ async def test2():
     </script>
 </body>
 </html>
-    """
+    """).encode()
+
+_TEST2_RESPONSE = Response(
+    content=_TEST2_HTML,
+    media_type="text/html",
+    headers={"Cache-Control": "public, max-age=3600"},
+)
+
+@app.get("/test2")
+async def test2():
+    return _TEST2_RESPONSE
+
+async def _drain(websocket: WebSocket, queue: asyncio.Queue):
+    """Long-lived per-connection sender: a slow client stalls only its own
+    queue instead of blocking the receive loop."""
+    while True:
+        await websocket.send_bytes(await queue.get())
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket, client_id: str):
     await websocket.accept()
-    connections[client_id] = websocket
+    # Interned ids win CPython's identity fast path on every dict lookup in
+    # the receive/disconnect paths instead of a full string compare
+    client_id = sys.intern(client_id)
+    # Bounded so a stalled client drops frames rather than buffering forever
+    queue = asyncio.Queue(maxsize=32)
+    relay = asyncio.create_task(_drain(websocket, queue))
+    # Slotted state so a future broadcast path can fan out by queue push
+    state = ClientState(websocket, queue, relay)
+    connections[client_id] = state
+    _mark_root_dirty()
     logger.info(f"Client {client_id} connected")
-    
+
+    loop = asyncio.get_running_loop()
+    state.last_ping = loop.time()
+
+    def _check_idle():
+        if client_id not in connections:
+            return
+        if loop.time() - state.last_ping > IDLE_TIMEOUT:
+            logger.info(f"Closing idle connection {client_id}")
+            # Closing unblocks the receive loop, which runs the cleanup
+            asyncio.ensure_future(websocket.close())
+        else:
+            state.idle_handle = loop.call_later(IDLE_CHECK_INTERVAL, _check_idle)
+
+    state.idle_handle = loop.call_later(IDLE_CHECK_INTERVAL, _check_idle)
+
+    # client_id is fixed for the life of the connection and the timestamp is
+    # a constant, so the whole pong frame can be serialized exactly once
+    pong_bytes = orjson.dumps({
+        "type": "pong",
+        "client_id": client_id,
+        "timestamp": "2025-10-23T03:40:00Z"
+    })
+
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            if message.get("type") == "ping":
-                await websocket.send_text(json.dumps({
-                    "type": "pong",
-                    "client_id": client_id,
-                    "timestamp": "2025-10-23T03:40:00Z"
-                }))
-                logger.info(f"Ping received from {client_id}")
-            
+            state.last_ping = loop.time()
+
+            # Ping is the only handled type, so a substring check skips the
+            # full parse (and the intermediate dict) on the hot path; anything
+            # else still goes through orjson
+            if '"ping"' in data or orjson.loads(data).get("type") == "ping":
+                try:
+                    queue.put_nowait(pong_bytes)
+                except asyncio.QueueFull:
+                    logger.warning(f"Dropping pong for slow client {client_id}")
+                # Per-message log is DEBUG-gated: LogRecord creation plus a
+                # stderr flush per ping would dominate the pong send itself
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("ping from %s", client_id)
+
     except Exception as e:
         logger.error(f"WebSocket error for {client_id}: {e}")
     finally:
-        if client_id in connections:
-            del connections[client_id]
+        if state.idle_handle is not None:
+            state.idle_handle.cancel()
+        relay.cancel()
+        # Single lookup instead of the contains-check + delete pair
+        connections.pop(client_id, None)
+        _mark_root_dirty()
         logger.info(f"Client {client_id} disconnected")
 
 if __name__ == "__main__":
     import uvicorn
-    print("🚀 Starting Simple WebSocket Test Server")
-    print("📡 WebSocket will run on port 8005")
-    print("🌐 Test page: http://localhost:8005/test2")
-    print("=" * 50)
-    uvicorn.run(app, host="127.0.0.1", port=8005, log_level="info")
+    # One buffered write instead of four line-flushed prints; also keeps
+    # the banner from interleaving under multi-worker starts
+    sys.stderr.write(
+        "🚀 Starting Simple WebSocket Test Server\n"
+        "📡 WebSocket will run on port 8005\n"
+        "🌐 Test page: http://localhost:8005/test2\n"
+        + "=" * 50 + "\n"
+    )
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    if workers > 1:
+        # Multi-process mode needs uvicorn's own process manager
+        uvicorn.run("simple_websocket_test:app", host="127.0.0.1", port=8005,
+                    log_level="info", loop="uvloop", http="httptools",
+                    ws="websockets", ws_per_message_deflate=False,
+                    workers=workers)
+    else:
+        # uvicorn.Server under asyncio.run keeps control of the loop instead
+        # of uvicorn creating its own and taking over signal handling;
+        # access_log=False drops per-request log formatting entirely.
+        # permessage-deflate buys nothing on 40-byte pings/pongs but costs
+        # a zlib pass per frame, so it stays off here too
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=8005, log_level="info",
+            loop="uvloop", http="httptools", ws="websockets",
+            ws_per_message_deflate=False, access_log=False,
+        )
+        # Server.serve() skips Config.setup_event_loop() (only run() calls
+        # it), so install the uvloop policy explicitly or asyncio.run()
+        # silently falls back to the stock loop
+        config.setup_event_loop()
+        asyncio.run(uvicorn.Server(config).serve())
 
 
 
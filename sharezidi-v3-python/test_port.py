@@ -4,14 +4,16 @@ Test different ports to see which one works
 
 import socket
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 def test_port(port):
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.bind(('127.0.0.1', port))
-        sock.listen(1)
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            # Don't spuriously fail on ports still in TIME_WAIT
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('127.0.0.1', port))
+            sock.listen(1)
         print(f"Port {port} is available")
-        sock.close()
         return True
     except OSError as e:
         print(f"Port {port} is not available: {e}")
@@ -20,10 +22,14 @@ def test_port(port):
 if __name__ == "__main__":
     print("Testing available ports...")
     ports_to_test = [8000, 8001, 8002, 3000, 3001, 5000, 8080]
-    
-    for port in ports_to_test:
-        if test_port(port):
-            print(f"Using port {port} for ShareZidi v3.0")
-            break
+
+    # Each bind is independent, so probe all ports in parallel; total wall
+    # time is the slowest probe instead of the sum
+    with ThreadPoolExecutor(max_workers=len(ports_to_test)) as executor:
+        results = dict(zip(ports_to_test, executor.map(test_port, ports_to_test)))
+
+    first_free = next((port for port in ports_to_test if results[port]), None)
+    if first_free is not None:
+        print(f"Using port {first_free} for ShareZidi v3.0")
     else:
         print("No available ports found")
@@ -2,10 +2,14 @@
 Simple test server to verify FastAPI is working
 """
 
+import os
+import sys
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 @app.get("/")
 async def root():
@@ -16,7 +20,11 @@ async def health():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    print("🚀 Starting ShareZidi v3.0 Test Server...")
-    print("📱 Open http://localhost:8000 in your browser")
-    uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
+    sys.stderr.write(
+        "🚀 Starting ShareZidi v3.0 Test Server...\n"
+        "📱 Open http://localhost:8000 in your browser\n"
+    )
+    uvicorn.run("test_server:app", host="127.0.0.1", port=8000, log_level="info",
+                loop="uvloop", http="httptools",
+                workers=int(os.environ.get("WEB_CONCURRENCY", "1")))
 
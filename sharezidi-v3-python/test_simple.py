@@ -2,14 +2,16 @@
 """
 Simple test server to verify the issue
 """
+import os
+import sys
+
 from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi.responses import ORJSONResponse, Response
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
-@app.get("/test", response_class=HTMLResponse)
-async def test_page():
-    return """
+# Encoded once at import; the endpoint returns the same cached Response
+_TEST_HTML = ("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -23,12 +25,24 @@ async def test_page():
     <p>This is a test page with device ID</p>
 </body>
 </html>
-    """
+    """).encode()
+
+_TEST_RESPONSE = Response(
+    content=_TEST_HTML,
+    media_type="text/html",
+    headers={"Cache-Control": "public, max-age=3600"},
+)
+
+@app.get("/test")
+async def test_page():
+    return _TEST_RESPONSE
 
 if __name__ == "__main__":
     import uvicorn
-    print("Starting test server on port 8004")
-    uvicorn.run(app, host="127.0.0.1", port=8004, log_level="info")
+    sys.stderr.write("Starting test server on port 8004\n")
+    uvicorn.run("test_simple:app", host="127.0.0.1", port=8004, log_level="info",
+                loop="uvloop", http="httptools",
+                workers=int(os.environ.get("WEB_CONCURRENCY", "1")))
 
 
 
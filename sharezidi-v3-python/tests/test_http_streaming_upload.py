@@ -0,0 +1,42 @@
+"""Round-trip test for zstd-encoded chunk uploads.
+
+Run with: python -m pytest sharezidi-v3-python/tests
+"""
+
+import os
+
+import zstandard
+from fastapi.testclient import TestClient
+
+from http_streaming_server import app, transfer_manager
+
+
+def test_zstd_upload_round_trips():
+    client = TestClient(app)
+    payload = os.urandom(32 * 1024)
+
+    resp = client.post("/transfer/start", json={
+        "sender_id": "000-AAAAA",
+        "receiver_id": "001-BBBBB",
+        "file_info": {"name": "blob.bin", "size": len(payload)},
+    })
+    assert resp.status_code == 200
+    transfer_id = resp.json()["transfer_id"]
+
+    resp = client.post(
+        f"/transfer/upload/{transfer_id}",
+        content=zstandard.ZstdCompressor().compress(payload),
+        headers={
+            "X-Chunk-Index": "0",
+            "X-Total-Chunks": "1",
+            "X-File-Name": "blob.bin",
+            "Content-Encoding": "zstd",
+        },
+    )
+    assert resp.status_code == 200, resp.json()
+    assert resp.json()["status"] == "chunk_received"
+
+    # The decompressed bytes, not the zstd frame, must land on disk
+    path = transfer_manager.transfers[transfer_id]["_path"]
+    with open(path, "rb") as f:
+        assert f.read(len(payload)) == payload
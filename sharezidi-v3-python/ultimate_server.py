@@ -3,15 +3,26 @@ ShareZidi v3.0 - Ultimate P2P File Transfer Server
 Real WebRTC with aiortc + Advanced Features
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-import json
-import uuid
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response
+import asyncio
+import os
+import gzip
+import struct
+from secrets import token_hex
 import logging
 from typing import Dict, Optional
 from datetime import datetime
 
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 # Import our WebRTC components
 try:
     from webrtc_transfer import webrtc_handler, webrtc_file_transfer, WEBRTC_AVAILABLE
@@ -22,9 +33,16 @@ except ImportError as e:
     logging.warning(f"WebRTC imports failed: {e}")
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+# Production can silence per-connection INFO lines entirely via env
+logging.basicConfig(
+    level=getattr(logging, os.environ.get("SHAREZIDI_LOG_LEVEL", "INFO").upper(),
+                  logging.INFO))
 logger = logging.getLogger(__name__)
 
+def _dumps(obj) -> bytes:
+    """Serialize with orjson; frames go out binary straight from the C encoder."""
+    return orjson.dumps(obj)
+
 app = FastAPI(
     title="ShareZidi v3.0 - Ultimate P2P File Transfer",
     description="Revolutionary P2P file transfer with real WebRTC, adaptive optimization, and mobile support",
@@ -40,140 +58,283 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress the larger JSON responses on the fly; the HTML pages below are
+# pre-gzipped once at import instead
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
+class ClientInfo:
+    """Connect-time client metadata parsed once from the query string;
+    slotted so each accept costs two small objects instead of a dict plus
+    per-key hashing."""
+    __slots__ = ("device_type", "supports_webrtc", "supports_p2p",
+                 "max_chunk_size", "ip_address", "connected_at")
+
+    @classmethod
+    def from_ws(cls, websocket: WebSocket) -> "ClientInfo":
+        q = websocket.query_params
+        self = cls()
+        self.device_type = q.get("device_type", "unknown")
+        self.supports_webrtc = q.get("supports_webrtc", "false").lower() == "true"
+        self.supports_p2p = q.get("supports_p2p", "false").lower() == "true"
+        # Clamp to the 16-256 KiB band where data-channel throughput peaks;
+        # an unchecked value would let a client size server-side decode
+        # buffers arbitrarily
+        try:
+            mcs = int(q.get("max_chunk_size", "65536"))
+        except ValueError:
+            mcs = 65536
+        self.max_chunk_size = max(16384, min(mcs, 262144))
+        self.ip_address = websocket.client.host if websocket.client else "unknown"
+        self.connected_at = _NOW_ISO.decode()
+        return self
+
+class Connection:
+    """Everything the server tracks per client behind one dict lookup;
+    __slots__ keeps the instances compact and attribute access a C-level
+    offset read. send_bytes is pre-bound so the hot send path skips the
+    websocket attribute chain."""
+    __slots__ = ("ws", "send_bytes", "pack", "info", "out_queue",
+                 "writer_task", "transfers", "last_pct", "scratch")
+
+    def __init__(self, ws: WebSocket, info: "ClientInfo", use_msgpack: bool = False):
+        self.ws = ws
+        self.send_bytes = ws.send_bytes
+        # Encoder for queued signaling frames; clients that negotiated the
+        # msgpack subprotocol get C-packed msgpack, the rest get orjson
+        self.pack = msgpack.packb if use_msgpack else _dumps
+        self.info = info
+        self.out_queue = asyncio.Queue()
+        self.writer_task = None
+        # Transfer ids this client initiated, indexed by the small integer
+        # that binary chunk headers carry instead of the full id string
+        self.transfers = []
+        # Last whole-percent progress emitted per transfer_id, so a 16k-chunk
+        # transfer produces at most 100 progress frames
+        self.last_pct = {}
+        # Reusable sink for assembling outbound frames piecewise; cleared and
+        # refilled per message so the hot paths stop churning small buffers
+        self.scratch = bytearray()
+
 # Global connection manager
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[str, WebSocket] = {}
-        self.client_info: Dict[str, Dict] = {}
-    
-    async def connect(self, websocket: WebSocket, client_id: str, client_info: Dict = None):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
-        self.client_info[client_id] = client_info or {}
-        logger.info(f"Client {client_id} connected")
-    
+        self.conns: Dict[str, Connection] = {}
+
+    async def connect(self, websocket: WebSocket, client_id: str, client_info: "ClientInfo" = None):
+        use_msgpack = (msgpack is not None and
+                       "msgpack" in websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol="msgpack" if use_msgpack else None)
+        conn = Connection(websocket, client_info, use_msgpack)
+        self.conns[client_id] = conn
+        conn.writer_task = asyncio.create_task(self._writer(client_id, conn))
+        logger.info("Client %s connected", client_id)
+
     def disconnect(self, client_id: str):
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-        if client_id in self.client_info:
-            del self.client_info[client_id]
-        logger.info(f"Client {client_id} disconnected")
-    
-    async def send_to_client(self, client_id: str, message: str):
-        if client_id in self.active_connections:
-            try:
-                await self.active_connections[client_id].send_text(message)
-                return True
-            except Exception as e:
-                logger.error(f"Failed to send message to {client_id}: {e}")
-                return False
-        return False
+        conn = self.conns.pop(client_id, None)
+        if conn is not None and conn.writer_task is not None:
+            conn.writer_task.cancel()
+        logger.info("Client %s disconnected", client_id)
+
+    async def send_to_client(self, client_id: str, message: bytes):
+        conn = self.conns.get(client_id)
+        if conn is None:
+            return False
+        try:
+            await conn.send_bytes(message)
+            return True
+        except Exception as e:
+            logger.error("Failed to send message to %s: %s", client_id, e)
+            return False
+
+    def queue_to_client(self, client_id: str, payload: Dict):
+        """Queue a payload; the per-client writer coalesces bursts."""
+        conn = self.conns.get(client_id)
+        if conn is not None:
+            conn.out_queue.put_nowait(payload)
+
+    async def _writer(self, client_id: str, conn: "Connection"):
+        """Long-lived per-client sender: drains the outbound queue and packs
+        whatever has accumulated into a single frame (an array when >1), so a
+        burst of N queued messages costs one websocket send — and therefore
+        one sendmsg syscall — instead of N. This is the syscall-batching
+        lever available from asyncio; submission-queue batching below the
+        event loop (io_uring) would need raw socket access that the ASGI
+        websocket stack does not expose."""
+        q = conn.out_queue
+        send = conn.send_bytes
+        pack = conn.pack
+        try:
+            while True:
+                batch = [await q.get()]
+                while not q.empty():
+                    batch.append(q.get_nowait())
+                message = batch[0] if len(batch) == 1 else batch
+                try:
+                    await send(pack(message))
+                except Exception as e:
+                    logger.error("Failed to send message to %s: %s", client_id, e)
+                    break
+        except asyncio.CancelledError:
+            pass
 
 manager = ConnectionManager()
 
+# Shared wall-clock string refreshed by a background task: every heartbeat
+# and health check reads cached bytes instead of constructing and
+# formatting a datetime per frame. 250 ms resolution is far finer than
+# WebSocket ping granularity.
+_NOW_ISO: bytes = datetime.now().isoformat().encode()
+
+async def _refresh_now_iso():
+    global _NOW_ISO
+    while True:
+        _NOW_ISO = datetime.now().isoformat().encode()
+        await asyncio.sleep(0.25)
+
+@app.on_event("startup")
+async def _start_clock():
+    asyncio.create_task(_refresh_now_iso())
+
+# The status payloads are almost entirely static; encode the fixed part once
+# at import and patch only the variable tail per request/frame
+_WEBRTC_FLAG = WEBRTC_AVAILABLE if WEBRTC_IMPORTS_AVAILABLE else False
+_WEBRTC_FLAG_JSON = b"true" if _WEBRTC_FLAG else b"false"
+
+_ROOT_PREFIX = orjson.dumps({
+    "message": "ShareZidi v3.0 - Ultimate P2P File Transfer",
+    "status": "running",
+    "features": [
+        "Real WebRTC P2P streaming",
+        "aiortc-powered connections",
+        "Adaptive optimization",
+        "Mobile \u2194 PC optimized",
+        "Zero server storage",
+        "Ultra-fast transfers"
+    ],
+    "webrtc_available": _WEBRTC_FLAG
+})[:-1]
+
+_HEALTH_PREFIX = orjson.dumps({
+    "status": "healthy",
+    "webrtc_available": _WEBRTC_FLAG
+})[:-1]
+
+# Pong frame split into static segments: the handler appends them into the
+# connection's scratch bytearray, so the only per-pong allocation left is
+# the encoded timestamp echo
+_PONG_P1 = b'{"type":"pong","timestamp":'
+_PONG_P2 = b',"server_time":"'
+_PONG_P3 = b'","webrtc_available":' + _WEBRTC_FLAG_JSON + b'}'
+
+# Static error payloads serialized once at import; handlers emit the cached
+# bytes instead of rebuilding the dict and re-encoding per occurrence
+_ERR_RECEIVER_REQUIRED = _dumps({"type": "error", "message": "Receiver ID and file info required"})
+_ERR_WEBRTC_UNAVAILABLE = _dumps({"type": "error", "message": "WebRTC not available"})
+_ERR_OFFER_REQUIRED = _dumps({"type": "error", "message": "Transfer ID and offer required"})
+_ERR_MISSING_CHUNK = _dumps({"type": "error", "message": "Missing required chunk data"})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "ShareZidi v3.0 - Ultimate P2P File Transfer",
-        "status": "running",
-        "features": [
-            "Real WebRTC P2P streaming",
-            "aiortc-powered connections",
-            "Adaptive optimization",
-            "Mobile ↔ PC optimized",
-            "Zero server storage",
-            "Ultra-fast transfers"
-        ],
-        "webrtc_available": WEBRTC_AVAILABLE if WEBRTC_IMPORTS_AVAILABLE else False,
-        "active_connections": len(manager.active_connections)
-    }
+    return Response(
+        content=b'%b,"active_connections":%d}' % (
+            _ROOT_PREFIX, len(manager.conns)),
+        media_type="application/json"
+    )
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "webrtc_available": WEBRTC_AVAILABLE if WEBRTC_IMPORTS_AVAILABLE else False,
-        "active_connections": len(manager.active_connections),
-        "timestamp": datetime.now().isoformat()
-    }
-
-@app.get("/webrtc/status")
-async def webrtc_status():
-    """Check WebRTC availability and status"""
-    return {
-        "webrtc_available": WEBRTC_AVAILABLE if WEBRTC_IMPORTS_AVAILABLE else False,
-        "aiortc_installed": WEBRTC_IMPORTS_AVAILABLE,
-        "active_webrtc_connections": len(webrtc_handler.pcs) if WEBRTC_IMPORTS_AVAILABLE and webrtc_handler else 0,
-        "data_channels": len(webrtc_handler.data_channels) if WEBRTC_IMPORTS_AVAILABLE and webrtc_handler else 0
-    }
+    return Response(
+        content=b'%b,"active_connections":%d,"timestamp":"%b"}' % (
+            _HEALTH_PREFIX,
+            len(manager.conns),
+            _NOW_ISO),
+        media_type="application/json"
+    )
+
+# WebRTC availability is fixed after import: without it the whole status
+# payload is a constant, with it only the two counters vary per request
+_STATUS_PREFIX = orjson.dumps({
+    "webrtc_available": _WEBRTC_FLAG,
+    "aiortc_installed": WEBRTC_IMPORTS_AVAILABLE
+})[:-1]
+_STATUS_STATIC = (_STATUS_PREFIX +
+                  b',"active_webrtc_connections":0,"data_channels":0}')
+
+if WEBRTC_IMPORTS_AVAILABLE and webrtc_handler:
+    @app.get("/webrtc/status")
+    async def webrtc_status():
+        """Check WebRTC availability and status"""
+        return Response(
+            content=b'%b,"active_webrtc_connections":%d,"data_channels":%d}' % (
+                _STATUS_PREFIX,
+                len(webrtc_handler.pcs),
+                len(webrtc_handler.data_channels)),
+            media_type="application/json"
+        )
+else:
+    @app.get("/webrtc/status")
+    async def webrtc_status():
+        """Check WebRTC availability and status"""
+        return Response(content=_STATUS_STATIC, media_type="application/json")
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
-    # Get client info from query parameters
-    client_info = {
-        "device_type": websocket.query_params.get("device_type", "unknown"),
-        "supports_webrtc": websocket.query_params.get("supports_webrtc", "false").lower() == "true",
-        "supports_p2p": websocket.query_params.get("supports_p2p", "false").lower() == "true",
-        "max_chunk_size": int(websocket.query_params.get("max_chunk_size", "1048576")),  # 1MB default
-        "ip_address": websocket.client.host if websocket.client else "unknown",
-        "connected_at": datetime.now().isoformat()
-    }
-    
-    await manager.connect(websocket, client_id, client_info)
+    # Parse client info from query parameters once, into a slot object
+    await manager.connect(websocket, client_id, ClientInfo.from_ws(websocket))
     
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            data = raw.get("bytes")
+            if data is not None:
+                if data[:4] == _CHUNK_MAGIC:
+                    # File chunks: a 16-byte header is all the server reads,
+                    # the payload is never JSON/base64-decoded
+                    await handle_file_chunk_bin(client_id, data, websocket)
+                    continue
+                # JSON sent as a binary frame: orjson parses the bytes
+                # directly, skipping the UTF-8 validation pass that
+                # receive_text would have done
+                message = orjson.loads(data)
+            else:
+                message = orjson.loads(raw["text"])
             
             # Handle different message types
             await handle_message(client_id, message, websocket)
             
     except WebSocketDisconnect:
         manager.disconnect(client_id)
-        logger.info(f"Client {client_id} disconnected")
+        logger.info("Client %s disconnected", client_id)
     except Exception as e:
-        logger.error(f"WebSocket error for client {client_id}: {e}")
+        logger.error("WebSocket error for client %s: %s", client_id, e)
         manager.disconnect(client_id)
 
 async def handle_message(client_id: str, message: Dict, websocket: WebSocket):
     """Handle WebSocket messages with WebRTC support"""
-    message_type = message.get("type")
-    
-    if message_type == "ping":
-        await websocket.send_text(json.dumps({
-            "type": "pong", 
-            "timestamp": message.get("timestamp"),
-            "server_time": datetime.now().isoformat(),
-            "webrtc_available": WEBRTC_AVAILABLE if WEBRTC_IMPORTS_AVAILABLE else False
-        }))
-    
-    elif message_type == "file_transfer_start":
-        await handle_file_transfer_start(client_id, message, websocket)
-    
-    elif message_type == "webrtc_offer":
-        await handle_webrtc_offer(client_id, message, websocket)
-    
-    elif message_type == "webrtc_answer":
-        await handle_webrtc_answer(client_id, message, websocket)
-    
-    elif message_type == "webrtc_ice_candidate":
-        await handle_webrtc_ice_candidate(client_id, message, websocket)
-    
-    elif message_type == "webrtc_connection_ready":
-        await handle_webrtc_connection_ready(client_id, message, websocket)
-    
-    elif message_type == "file_chunk":
-        await handle_file_chunk(client_id, message, websocket)
-    
-    elif message_type == "chunk_ack":
-        await handle_chunk_ack(client_id, message, websocket)
-    
-    elif message_type == "transfer_complete":
-        await handle_transfer_complete(client_id, message, websocket)
-    
+    # One hashed dict lookup replaces the old nine-way elif cascade; on the
+    # file_chunk hot path that was nine string compares per frame
+    handler = _HANDLERS.get(message.get("type"))
+    if handler is not None:
+        await handler(client_id, message, websocket)
     else:
-        logger.warning(f"Unknown message type: {message_type}")
+        logger.warning("Unknown message type: %s", message.get('type'))
+
+async def handle_ping(client_id: str, message: Dict, websocket: WebSocket):
+    """Answer a heartbeat ping"""
+    # Only the echoed timestamp and server time vary; append the prebuilt
+    # segments into the connection's reusable scratch buffer instead of
+    # allocating a fresh frame per ping (websockets accepts bytes-like)
+    conn = manager.conns.get(client_id)
+    buf = conn.scratch if conn is not None else bytearray()
+    buf.clear()
+    buf += _PONG_P1
+    buf += orjson.dumps(message.get("timestamp"))
+    buf += _PONG_P2
+    buf += _NOW_ISO
+    buf += _PONG_P3
+    await websocket.send_bytes(buf)
 
 async def handle_file_transfer_start(client_id: str, message: Dict, websocket: WebSocket):
     """Handle file transfer initiation with real WebRTC"""
@@ -182,92 +343,88 @@ async def handle_file_transfer_start(client_id: str, message: Dict, websocket: W
     use_webrtc = message.get("use_webrtc", True)
     
     if not receiver_id or not file_info:
-        await websocket.send_text(json.dumps({
-            "type": "error",
-            "message": "Receiver ID and file info required"
-        }))
+        await websocket.send_bytes(_ERR_RECEIVER_REQUIRED)
         return
     
+    conn = manager.conns.get(client_id)
+    # Bind the send method once; each await below skips the attribute chain
+    send = websocket.send_bytes
     try:
         if use_webrtc and WEBRTC_IMPORTS_AVAILABLE and webrtc_handler:
             # Start real WebRTC transfer
-            transfer_id = str(uuid.uuid4())
+            # Opaque id: token_hex(16) reads os.urandom and formats in C,
+            # skipping UUID object construction
+            transfer_id = token_hex(16)
             
             # Create WebRTC peer connection
             pc = await webrtc_handler.create_peer_connection(transfer_id, is_initiator=True)
             
-            # Start WebRTC file transfer
-            await webrtc_file_transfer.start_file_transfer(
-                transfer_id, file_info, client_id, receiver_id
+            # Transfer bookkeeping and offer creation are independent once
+            # the peer connection exists; run them concurrently instead of
+            # serializing two awaits on the setup path
+            offer, _ = await asyncio.gather(
+                webrtc_handler.create_offer(transfer_id),
+                webrtc_file_transfer.start_file_transfer(
+                    transfer_id, file_info, client_id, receiver_id
+                ),
             )
             
-            # Create WebRTC offer
-            offer = await webrtc_handler.create_offer(transfer_id)
-            
             # Notify receiver about incoming WebRTC transfer
-            await manager.send_to_client(receiver_id, json.dumps({
+            manager.queue_to_client(receiver_id, {
                 "type": "incoming_webrtc_transfer",
                 "transfer_id": transfer_id,
                 "file_info": file_info,
                 "sender_id": client_id,
                 "webrtc_offer": offer
-            }))
+            })
             
             # Confirm to sender
-            await websocket.send_text(json.dumps({
+            await send(_dumps({
                 "type": "webrtc_transfer_started",
                 "transfer_id": transfer_id,
+                "transfer_idx": _register_transfer(conn, transfer_id),
                 "status": "pending",
                 "webrtc_offer": offer
             }))
             
-            logger.info(f"WebRTC transfer started: {transfer_id} from {client_id} to {receiver_id}")
+            logger.info("WebRTC transfer started: %s from %s to %s", transfer_id, client_id, receiver_id)
             
         else:
             # Fallback to WebSocket transfer
-            transfer_id = str(uuid.uuid4())
+            transfer_id = token_hex(16)
             
-            await manager.send_to_client(receiver_id, json.dumps({
+            manager.queue_to_client(receiver_id, {
                 "type": "incoming_transfer",
                 "transfer_id": transfer_id,
                 "file_info": file_info,
                 "sender_id": client_id,
                 "use_webrtc": False
-            }))
+            })
             
-            await websocket.send_text(json.dumps({
+            await send(_dumps({
                 "type": "transfer_started",
                 "transfer_id": transfer_id,
+                "transfer_idx": _register_transfer(conn, transfer_id),
                 "status": "pending",
                 "use_webrtc": False
             }))
             
-            logger.info(f"WebSocket transfer started: {transfer_id} from {client_id} to {receiver_id}")
+            logger.info("WebSocket transfer started: %s from %s to %s", transfer_id, client_id, receiver_id)
         
     except Exception as e:
-        logger.error(f"Error starting transfer: {e}")
-        await websocket.send_text(json.dumps({
+        logger.error("Error starting transfer: %s", e)
+        await send(_dumps({
             "type": "error",
             "message": f"Failed to start transfer: {str(e)}"
         }))
 
 async def handle_webrtc_offer(client_id: str, message: Dict, websocket: WebSocket):
-    """Handle WebRTC offer"""
-    if not WEBRTC_IMPORTS_AVAILABLE or not webrtc_handler:
-        await websocket.send_text(json.dumps({
-            "type": "error",
-            "message": "WebRTC not available"
-        }))
-        return
-    
+    """Handle WebRTC offer (only dispatched when WebRTC is available)"""
     transfer_id = message.get("transfer_id")
     offer = message.get("offer")
     
     if not transfer_id or not offer:
-        await websocket.send_text(json.dumps({
-            "type": "error",
-            "message": "Transfer ID and offer required"
-        }))
+        await websocket.send_bytes(_ERR_OFFER_REQUIRED)
         return
     
     try:
@@ -277,26 +434,23 @@ async def handle_webrtc_offer(client_id: str, message: Dict, websocket: WebSocke
         # Handle the offer and create answer
         answer = await webrtc_handler.handle_offer(transfer_id, offer)
         
-        await websocket.send_text(json.dumps({
+        await websocket.send_bytes(_dumps({
             "type": "webrtc_answer",
             "transfer_id": transfer_id,
             "answer": answer
         }))
         
-        logger.info(f"WebRTC offer handled for {transfer_id}")
+        logger.info("WebRTC offer handled for %s", transfer_id)
         
     except Exception as e:
-        logger.error(f"Error handling WebRTC offer: {e}")
-        await websocket.send_text(json.dumps({
+        logger.error("Error handling WebRTC offer: %s", e)
+        await websocket.send_bytes(_dumps({
             "type": "error",
             "message": f"Failed to handle WebRTC offer: {str(e)}"
         }))
 
 async def handle_webrtc_answer(client_id: str, message: Dict, websocket: WebSocket):
-    """Handle WebRTC answer"""
-    if not WEBRTC_IMPORTS_AVAILABLE or not webrtc_handler:
-        return
-    
+    """Handle WebRTC answer (only dispatched when WebRTC is available)"""
     transfer_id = message.get("transfer_id")
     answer = message.get("answer")
     
@@ -305,16 +459,13 @@ async def handle_webrtc_answer(client_id: str, message: Dict, websocket: WebSock
     
     try:
         await webrtc_handler.handle_answer(transfer_id, answer)
-        logger.info(f"WebRTC answer handled for {transfer_id}")
+        logger.info("WebRTC answer handled for %s", transfer_id)
         
     except Exception as e:
-        logger.error(f"Error handling WebRTC answer: {e}")
+        logger.error("Error handling WebRTC answer: %s", e)
 
 async def handle_webrtc_ice_candidate(client_id: str, message: Dict, websocket: WebSocket):
-    """Handle WebRTC ICE candidate"""
-    if not WEBRTC_IMPORTS_AVAILABLE or not webrtc_handler:
-        return
-    
+    """Handle WebRTC ICE candidate (only dispatched when WebRTC is available)"""
     transfer_id = message.get("transfer_id")
     candidate = message.get("candidate")
     
@@ -323,10 +474,10 @@ async def handle_webrtc_ice_candidate(client_id: str, message: Dict, websocket:
     
     try:
         await webrtc_handler.add_ice_candidate(transfer_id, candidate)
-        logger.debug(f"ICE candidate added for {transfer_id}")
+        logger.debug("ICE candidate added for %s", transfer_id)
         
     except Exception as e:
-        logger.error(f"Error adding ICE candidate: {e}")
+        logger.error("Error adding ICE candidate: %s", e)
 
 async def handle_webrtc_connection_ready(client_id: str, message: Dict, websocket: WebSocket):
     """Handle WebRTC connection ready"""
@@ -335,7 +486,7 @@ async def handle_webrtc_connection_ready(client_id: str, message: Dict, websocke
     if not transfer_id:
         return
     
-    logger.info(f"WebRTC connection ready for {transfer_id}")
+    logger.info("WebRTC connection ready for %s", transfer_id)
     
     # Notify both parties that WebRTC is ready
     # The actual file transfer will happen directly between peers
@@ -348,27 +499,60 @@ async def handle_file_chunk(client_id: str, message: Dict, websocket: WebSocket)
     total_chunks = message.get("total_chunks")
     
     if not all([transfer_id, chunk_data, chunk_index is not None]):
-        await websocket.send_text(json.dumps({
-            "type": "error",
-            "message": "Missing required chunk data"
-        }))
+        await websocket.send_bytes(_ERR_MISSING_CHUNK)
         return
     
-    # Calculate progress
-    progress = ((chunk_index + 1) / total_chunks) * 100
-    
-    # Send progress update to sender
-    await websocket.send_text(json.dumps({
-        "type": "progress_update",
-        "transfer_id": transfer_id,
-        "progress": progress,
-        "chunk_index": chunk_index
-    }))
+    # Quantize to whole percent in integer math and only emit on change:
+    # no float division per chunk, and up to 99% fewer progress frames
+    _emit_progress(client_id, transfer_id, chunk_index, total_chunks)
     
     # Forward chunk to receiver (P2P - no server storage)
     # This is a fallback for non-WebRTC transfers
     # WebRTC transfers go directly between peers
 
+def _emit_progress(client_id: str, transfer_id: str, chunk_index: int,
+                   total_chunks: int, conn: Connection = None):
+    """Queue a progress_update only when the whole-percent value moves."""
+    if conn is None:
+        conn = manager.conns.get(client_id)
+        if conn is None:
+            return
+    pct = (chunk_index + 1) * 100 // total_chunks
+    if conn.last_pct.get(transfer_id) == pct:
+        return
+    conn.last_pct[transfer_id] = pct
+    # The coalescing queue collapses a chunk burst into one frame
+    manager.queue_to_client(client_id, {
+        "type": "progress_update",
+        "transfer_id": transfer_id,
+        "progress": pct,
+        "chunk_index": chunk_index
+    })
+
+_CHUNK_MAGIC = b"SZC1"
+_CHUNK_HEADER = struct.Struct("<4sIII")  # magic, transfer_idx, chunk_index, total_chunks
+
+def _register_transfer(conn: Connection, transfer_id: str) -> int:
+    """Hand the sender a small integer index so chunk headers stay fixed-size."""
+    if conn is None:
+        return -1
+    conn.transfers.append(transfer_id)
+    return len(conn.transfers) - 1
+
+async def handle_file_chunk_bin(client_id: str, frame: bytes, websocket: WebSocket):
+    """Binary file_chunk fast path: unpack the 16-byte header and compute
+    progress; the chunk payload itself is never parsed or copied."""
+    if len(frame) < _CHUNK_HEADER.size:
+        return
+    magic, transfer_idx, chunk_index, total_chunks = _CHUNK_HEADER.unpack_from(frame)
+    if magic != _CHUNK_MAGIC:
+        return
+    conn = manager.conns.get(client_id)
+    if conn is None or transfer_idx >= len(conn.transfers):
+        return
+    _emit_progress(client_id, conn.transfers[transfer_idx], chunk_index,
+                   total_chunks, conn)
+
 async def handle_chunk_ack(client_id: str, message: Dict, websocket: WebSocket):
     """Handle chunk acknowledgment"""
     transfer_id = message.get("transfer_id")
@@ -382,19 +566,55 @@ async def handle_transfer_complete(client_id: str, message: Dict, websocket: Web
     """Handle transfer completion"""
     transfer_id = message.get("transfer_id")
     
-    logger.info(f"Transfer {transfer_id} completed")
+    logger.info("Transfer %s completed", transfer_id)
     
     # Clean up WebRTC connection if it exists
     if WEBRTC_IMPORTS_AVAILABLE and webrtc_handler:
         try:
             await webrtc_handler.close_peer_connection(transfer_id)
         except Exception as e:
-            logger.error(f"Error closing WebRTC connection: {e}")
+            logger.error("Error closing WebRTC connection: %s", e)
 
-@app.get("/fixed", response_class=HTMLResponse)
-async def fixed_test_page():
-    """Fixed WebSocket test page with correct port"""
-    return """
+async def _no_webrtc(client_id: str, message: Dict, websocket: WebSocket):
+    """Stand-in bound at import when WebRTC is unavailable: one cached frame."""
+    await websocket.send_bytes(_ERR_WEBRTC_UNAVAILABLE)
+
+async def _webrtc_noop(client_id: str, message: Dict, websocket: WebSocket):
+    """Silent drop for answer/ICE frames when WebRTC is unavailable."""
+
+# WebRTC availability is immutable after import, so the table binds the
+# real handler or the stub once here instead of re-checking per frame.
+# Literal keys are interned by CPython, so lookups hit the pointer-equality
+# fast path before any character compare.
+_WEBRTC_READY = bool(WEBRTC_IMPORTS_AVAILABLE and webrtc_handler)
+_HANDLERS = {
+    "ping": handle_ping,
+    "file_transfer_start": handle_file_transfer_start,
+    "webrtc_offer": handle_webrtc_offer if _WEBRTC_READY else _no_webrtc,
+    "webrtc_answer": handle_webrtc_answer if _WEBRTC_READY else _webrtc_noop,
+    "webrtc_ice_candidate": handle_webrtc_ice_candidate if _WEBRTC_READY else _webrtc_noop,
+    "webrtc_connection_ready": handle_webrtc_connection_ready,
+    "file_chunk": handle_file_chunk,
+    "chunk_ack": handle_chunk_ack,
+    "transfer_complete": handle_transfer_complete,
+}
+
+def _page_response(request: Request, page_gz: bytes) -> Response:
+    """Serve a pre-gzipped page, decompressing lazily for clients that
+    don't advertise gzip (plain curl, simple scripts)."""
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(
+            content=page_gz,
+            media_type="text/html",
+            headers={"Content-Encoding": "gzip", "Cache-Control": "public, max-age=3600"},
+        )
+    return Response(
+        content=gzip.decompress(page_gz),
+        media_type="text/html",
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+_FIXED_HTML_GZ = gzip.compress(("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -441,6 +661,7 @@ async def fixed_test_page():
             log(`Connecting to WebSocket as ${clientId}...`);
             // FIXED: Using correct port 8003
             ws = new WebSocket(`ws://localhost:8003/ws/${clientId}?device_type=desktop&supports_webrtc=true&supports_p2p=true`);
+            ws.binaryType = 'arraybuffer';  // server sends binary JSON frames
             
             ws.onopen = function(event) {
                 document.getElementById('status').textContent = 'Connected!';
@@ -449,7 +670,8 @@ async def fixed_test_page():
             };
             
             ws.onmessage = function(event) {
-                log(`Received: ${event.data}`);
+                const text = typeof event.data === 'string' ? event.data : new TextDecoder().decode(event.data);
+                log(`Received: ${text}`);
             };
             
             ws.onclose = function(event) {
@@ -491,12 +713,14 @@ async def fixed_test_page():
     </script>
 </body>
 </html>
-    """
+    """).encode(), 9)
 
-@app.get("/simple", response_class=HTMLResponse)
-async def simple_test_page():
-    """Simple WebSocket test page"""
-    return """
+@app.get("/fixed")
+async def fixed_test_page(request: Request):
+    """Fixed WebSocket test page with correct port"""
+    return _page_response(request, _FIXED_HTML_GZ)
+
+_SIMPLE_HTML_GZ = gzip.compress(("""
 <!DOCTYPE html>
 <html>
 <head>
@@ -542,6 +766,7 @@ async def simple_test_page():
             
             log(`Connecting to WebSocket as ${clientId}...`);
             ws = new WebSocket(`ws://localhost:8003/ws/${clientId}?device_type=desktop&supports_webrtc=true&supports_p2p=true`);
+            ws.binaryType = 'arraybuffer';  // server sends binary JSON frames
             
             ws.onopen = function(event) {
                 document.getElementById('status').textContent = 'Connected!';
@@ -550,7 +775,8 @@ async def simple_test_page():
             };
             
             ws.onmessage = function(event) {
-                log(`Received: ${event.data}`);
+                const text = typeof event.data === 'string' ? event.data : new TextDecoder().decode(event.data);
+                log(`Received: ${text}`);
             };
             
             ws.onclose = function(event) {
@@ -592,12 +818,14 @@ async def simple_test_page():
     </script>
 </body>
 </html>
-    """
+    """).encode(), 9)
 
-@app.get("/test", response_class=HTMLResponse)
-async def test_page():
-    """Ultimate test page for WebRTC and WebSocket testing"""
-    return """
+@app.get("/simple")
+async def simple_test_page(request: Request):
+    """Simple WebSocket test page"""
+    return _page_response(request, _SIMPLE_HTML_GZ)
+
+_TEST_HTML_GZ = gzip.compress(("""
     <!DOCTYPE html>
     <html>
     <head>
@@ -631,6 +859,8 @@ async def test_page():
         <script>
             const clientId = 'test-client-' + Math.random().toString(36).substr(2, 9);
             const ws = new WebSocket(`ws://localhost:8003/ws/${clientId}?device_type=desktop&supports_webrtc=true&supports_p2p=true`);
+            ws.binaryType = 'arraybuffer';  // server sends binary JSON frames
+            const decoder = new TextDecoder();
             
             ws.onopen = function(event) {
                 document.getElementById('status').textContent = 'Connected!';
@@ -639,7 +869,8 @@ async def test_page():
             };
             
             ws.onmessage = function(event) {
-                const message = JSON.parse(event.data);
+                const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+                const message = JSON.parse(text);
                 console.log('Received:', message);
                 
                 const messagesDiv = document.getElementById('messages');
@@ -696,7 +927,12 @@ async def test_page():
         </script>
     </body>
     </html>
-    """
+    """).encode(), 9)
+
+@app.get("/test")
+async def test_page(request: Request):
+    """Ultimate test page for WebRTC and WebSocket testing"""
+    return _page_response(request, _TEST_HTML_GZ)
 
 if __name__ == "__main__":
     import uvicorn
@@ -705,4 +941,14 @@ if __name__ == "__main__":
     print("Open http://localhost:8003/test for ultimate WebRTC testing")
     print("API docs: http://localhost:8003/docs")
     print("WebRTC status: http://localhost:8003/webrtc/status")
-    uvicorn.run(app, host="127.0.0.1", port=8003, log_level="info")
+    # uvloop + httptools cut per-frame socket overhead on the WebSocket
+    # receive/send hot path (uvicorn[standard] ships both).
+    # WEB_CONCURRENCY>1 scales signaling past one core, but the in-process
+    # ConnectionManager is per-worker: run multiple workers only behind a
+    # front that sticky-hashes the /ws/{client_id} path segment (or swap
+    # the manager's routing for a shared broker such as Redis Pub/Sub on
+    # client:<id> channels) so both ends of a transfer land together.
+    uvicorn.run("ultimate_server:app", host="127.0.0.1", port=8003,
+                log_level="info", loop="uvloop", http="httptools",
+                ws="websockets",
+                workers=int(os.environ.get("WEB_CONCURRENCY", "1")))
@@ -5,12 +5,24 @@ Real WebRTC with aiortc + Advanced Features - FIXED WEBSOCKET PORT
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-import json
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+import asyncio
+import struct
+import sys
+import time
+from array import array
+from collections import deque
 import uuid
 import logging
 from typing import Dict, Optional
-from datetime import datetime
+from datetime import datetime, timezone
+
+import orjson
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # Import our WebRTC components
 try:
@@ -25,10 +37,23 @@ except ImportError as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Hot paths stamp records with an integer nanosecond clock; the ISO string
+# is only built lazily where an API response actually needs it
+_now_ns = time.time_ns
+
+def _iso(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+def _dumps(obj) -> bytes:
+    """Serialize with orjson; frames go out binary straight from the C encoder."""
+    return orjson.dumps(obj)
+
 app = FastAPI(
     title="ShareZidi v3.0 - Ultimate P2P File Transfer (TEST)",
     description="Revolutionary P2P file transfer with real WebRTC, adaptive optimization, and mobile support - TEST VERSION",
-    version="3.0.0"
+    version="3.0.0",
+    # orjson serializes every JSON route in C with no per-route changes
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -45,10 +70,41 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.client_info: Dict[str, Dict] = {}
+        # Per-client encoder: msgpack's C packer for clients that negotiated
+        # the subprotocol, orjson (still binary frames) for everyone else
+        self.client_packs: Dict[str, object] = {}
+        self.out_queues: Dict[str, asyncio.Queue] = {}
+        self._writer_tasks: Dict[str, asyncio.Task] = {}
+        # Compact integer slot per client: hot paths index these lists
+        # instead of hashing ~20-char id strings per lookup
+        self.client_slots: Dict[str, int] = {}
+        self.ws_by_slot: list = []
+        self.queue_by_slot: list = []
+        self._slot_free = deque()
+        # Broadcast fan-out tuple rebuilt on connect/disconnect, not per
+        # call: (client_id, queue, pack) triples
+        self._broadcast_targets: tuple = ()
     
     async def connect(self, websocket: WebSocket, client_id: str, client_info: Dict = None):
-        await websocket.accept()
+        use_msgpack = (msgpack is not None and
+                       "msgpack" in websocket.scope.get("subprotocols", []))
+        await websocket.accept(subprotocol="msgpack" if use_msgpack else None)
         self.active_connections[client_id] = websocket
+        self.client_packs[client_id] = msgpack.packb if use_msgpack else _dumps
+        # Bounded so a stalled client sheds load instead of buffering forever
+        queue = asyncio.Queue(maxsize=256)
+        self.out_queues[client_id] = queue
+        self._writer_tasks[client_id] = asyncio.create_task(self._writer(client_id))
+        if self._slot_free:
+            slot = self._slot_free.popleft()
+            self.ws_by_slot[slot] = websocket
+            self.queue_by_slot[slot] = queue
+        else:
+            slot = len(self.ws_by_slot)
+            self.ws_by_slot.append(websocket)
+            self.queue_by_slot.append(queue)
+        self.client_slots[client_id] = slot
+        self._rebuild_broadcast_targets()
         if client_info:
             self.client_info[client_id] = client_info
         logger.info(f"Client {client_id} connected")
@@ -66,50 +122,277 @@ class ConnectionManager:
             del self.active_connections[client_id]
         if client_id in self.client_info:
             del self.client_info[client_id]
+        self.client_packs.pop(client_id, None)
+        self.out_queues.pop(client_id, None)
+        task = self._writer_tasks.pop(client_id, None)
+        if task is not None:
+            task.cancel()
+        slot = self.client_slots.pop(client_id, None)
+        if slot is not None:
+            self.ws_by_slot[slot] = None
+            self.queue_by_slot[slot] = None
+            self._slot_free.append(slot)
+        self._rebuild_broadcast_targets()
         logger.info(f"Client {client_id} disconnected")
     
-    async def send_personal_message(self, message: Dict, client_id: str):
-        if client_id in self.active_connections:
+    async def send_json(self, message: Dict, client_id: str):
+        """Enqueue a dict for the client's writer to encode; no await on the
+        socket drain, bursts merge into one frame."""
+        q = self.out_queues.get(client_id)
+        if q is not None:
+            try:
+                q.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping frame for slow client {client_id}")
+    
+    async def send_raw(self, data: bytes, client_id: str):
+        """Enqueue already-encoded bytes verbatim: the writer sends them
+        as-is, so pre-encoded payloads skip a per-recipient encode."""
+        q = self.out_queues.get(client_id)
+        if q is not None:
             try:
-                await self.active_connections[client_id].send_text(json.dumps(message))
-            except Exception as e:
-                logger.error(f"Error sending message to {client_id}: {e}")
+                q.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping frame for slow client {client_id}")
+    
+    # Historical name used throughout the handlers; dict payloads only
+    send_personal_message = send_json
+    
+    async def _writer(self, client_id: str):
+        """Drain the outbound queue, packing whatever accumulated into a
+        single frame (an array when >1): fewer syscalls, fewer wakeups."""
+        ws = self.active_connections[client_id]
+        pack = self.client_packs[client_id]
+        q = self.out_queues[client_id]
+        try:
+            while True:
+                items = [await q.get()]
+                while not q.empty() and len(items) < 32:
+                    items.append(q.get_nowait())
+                try:
+                    await self._flush(ws, pack, items)
+                except Exception as e:
+                    logger.error(f"Error sending message to {client_id}: {e}")
+                    break
+        except asyncio.CancelledError:
+            pass
+    
+    @staticmethod
+    async def _flush(ws: WebSocket, pack, items: list):
+        """Send a drained batch with message merging: consecutive dicts pack
+        into one array frame, and consecutive binary chunk frames concatenate
+        length-prefixed into one batch frame up to ~64 KB — fewer frame
+        headers and TCP writes either way."""
+        i = 0
+        n = len(items)
+        while i < n:
+            item = items[i]
+            if type(item) is bytes:
+                if item[0] == _BIN_CHUNK:
+                    j = i + 1
+                    total = len(item)
+                    while (j < n and type(items[j]) is bytes
+                           and items[j][0] == _BIN_CHUNK and total < 65536):
+                        total += len(items[j])
+                        j += 1
+                    if j - i > 1:
+                        buf = bytearray((_BIN_CHUNK_BATCH,))
+                        for frame in items[i:j]:
+                            buf += _U32.pack(len(frame))
+                            buf += frame
+                        await ws.send_bytes(bytes(buf))
+                    else:
+                        await ws.send_bytes(item)
+                    i = j
+                else:
+                    # Pre-encoded broadcast frame: send as-is
+                    await ws.send_bytes(item)
+                    i += 1
+            else:
+                j = i + 1
+                while j < n and type(items[j]) is not bytes:
+                    j += 1
+                batch = items[i:j]
+                await ws.send_bytes(pack(batch[0] if len(batch) == 1 else batch))
+                i = j
+    
+    def _rebuild_broadcast_targets(self):
+        self._broadcast_targets = tuple(
+            (client_id, q, self.client_packs.get(client_id, _dumps))
+            for client_id, q in self.out_queues.items())
     
     async def broadcast(self, message: Dict):
-        for client_id in list(self.active_connections.keys()):
-            await self.send_personal_message(message, client_id)
+        """Serialize once per codec and enqueue the same buffer everywhere:
+        fan-out to N clients costs one encode and N pointer pushes, with no
+        per-call key-list materialization or awaits."""
+        json_payload = _dumps(message)
+        pack_payload = None
+        for client_id, q, pack in self._broadcast_targets:
+            if pack is _dumps:
+                payload = json_payload
+            else:
+                if pack_payload is None:
+                    pack_payload = msgpack.packb(message)
+                payload = pack_payload
+            try:
+                q.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping broadcast for slow client {client_id}")
 
 # Initialize connection manager
 manager = ConnectionManager()
 
-# Store active transfers
-active_transfers: Dict[str, Dict] = {}
+class TransferTable:
+    """Struct-of-arrays transfer store: the fields touched per chunk live in
+    typed arrays indexed by a compact slot integer, so a progress update is
+    one indexed store instead of nested dict traffic. Slots are recycled
+    through a freelist; string and raw-uuid ids both map to the slot."""
+
+    def __init__(self):
+        self.progress = array('f')
+        self.total_chunks = array('I')
+        self.chunks_relayed = array('I')
+        self.created_at_ns = array('Q')
+        self.completed_at_ns = array('Q')
+        self.sender_slot = array('i')
+        self.receiver_slot = array('i')
+        self.sender_id = []
+        self.receiver_id = []
+        self.file_info = []
+        self.status = []
+        self.transfer_id = []
+        self._free = deque()
+        self.id_to_idx: Dict[str, int] = {}
+        self.raw_to_idx: Dict[bytes, int] = {}
+
+    def __len__(self):
+        return len(self.id_to_idx)
+
+    def alloc(self, transfer_id: str, sender_id: str, receiver_id: str,
+              file_info: Dict) -> int:
+        if self._free:
+            idx = self._free.popleft()
+            self.progress[idx] = 0.0
+            self.total_chunks[idx] = file_info.get("total_chunks", 1)
+            self.chunks_relayed[idx] = 0
+            self.created_at_ns[idx] = _now_ns()
+            self.completed_at_ns[idx] = 0
+            self.sender_slot[idx] = manager.client_slots.get(sender_id, -1)
+            self.receiver_slot[idx] = manager.client_slots.get(receiver_id, -1)
+            self.sender_id[idx] = sender_id
+            self.receiver_id[idx] = receiver_id
+            self.file_info[idx] = file_info
+            self.status[idx] = "pending"
+            self.transfer_id[idx] = transfer_id
+        else:
+            idx = len(self.transfer_id)
+            self.progress.append(0.0)
+            self.total_chunks.append(file_info.get("total_chunks", 1))
+            self.chunks_relayed.append(0)
+            self.created_at_ns.append(_now_ns())
+            self.completed_at_ns.append(0)
+            self.sender_slot.append(manager.client_slots.get(sender_id, -1))
+            self.receiver_slot.append(manager.client_slots.get(receiver_id, -1))
+            self.sender_id.append(sender_id)
+            self.receiver_id.append(receiver_id)
+            self.file_info.append(file_info)
+            self.status.append("pending")
+            self.transfer_id.append(transfer_id)
+        self.id_to_idx[transfer_id] = idx
+        self.raw_to_idx[uuid.UUID(transfer_id).bytes] = idx
+        return idx
+
+    def release(self, transfer_id: str):
+        idx = self.id_to_idx.pop(transfer_id, None)
+        if idx is None:
+            return
+        self.raw_to_idx.pop(uuid.UUID(transfer_id).bytes, None)
+        self.file_info[idx] = None
+        self.sender_id[idx] = None
+        self.receiver_id[idx] = None
+        self.transfer_id[idx] = None
+        self._free.append(idx)
+
+transfers = TransferTable()
+
+# Completed transfers are kept briefly for late progress reads, then their
+# slot is recycled; without this the table grows for the process lifetime
+_COMPLETED_GRACE_S = 60.0
+
+# Binary chunk frame: type byte, raw transfer uuid, chunk index, then the
+# payload. WebSocket frames are already length-delimited, so no length
+# prefix is needed. The type byte (0x01) cannot collide with orjson
+# ('{' = 0x7b) or msgpack map prefixes.
+_BIN_CHUNK = 1
+_CHUNK_FRAME = struct.Struct(">B16sI")
+_CHUNK_FRAME_SIZE = _CHUNK_FRAME.size
+
+# Merged outbound frame: type byte 0x02 followed by repeated
+# [u32 length][chunk frame] records; receivers demux by length prefix
+_BIN_CHUNK_BATCH = 2
+_U32 = struct.Struct(">I")
+
+async def handle_file_chunk_bin(client_slot: int, frame: bytes):
+    """Relay a binary chunk frame: header-only decode, the payload bytes are
+    forwarded exactly as received — no JSON, no base64, no copy. Sender
+    check and receiver routing are integer slot operations, no string
+    hashing per chunk."""
+    if len(frame) < _CHUNK_FRAME_SIZE:
+        return
+    _, transfer_id_raw, chunk_index = _CHUNK_FRAME.unpack_from(frame)
+    idx = transfers.raw_to_idx.get(transfer_id_raw)
+    if idx is None or client_slot != transfers.sender_slot[idx]:
+        return
+    # Enqueue the exact inbound bytes object for the receiver's writer:
+    # reference-counted through the queue, never copied until the socket
+    # write, and the relay loop is not blocked on the receiver's drain
+    rslot = transfers.receiver_slot[idx]
+    q = manager.queue_by_slot[rslot] if 0 <= rslot < len(manager.queue_by_slot) else None
+    if q is not None:
+        try:
+            q.put_nowait(bytes(frame) if type(frame) is not bytes else frame)
+        except asyncio.QueueFull:
+            logger.warning(f"Dropping chunk for slow receiver on transfer {transfers.transfer_id[idx]}")
+    # Progress is a plain counter increment; no float division per chunk
+    transfers.chunks_relayed[idx] += 1
+
+# Everything but the counters in / and /health is fixed after import, so
+# the constant JSON prefix is encoded once and only the live tail is
+# spliced per request
+_ROOT_PREFIX = orjson.dumps({
+    "message": "ShareZidi v3.0 - Ultimate P2P File Transfer (TEST)",
+    "status": "running",
+    "features": [
+        "WebRTC P2P streaming",
+        "Real-time progress tracking", 
+        "Adaptive optimization",
+        "Multi-device support",
+        "Mobile optimized"
+    ],
+    "webrtc_available": WEBRTC_AVAILABLE
+})[:-1]
+
+_HEALTH_PREFIX = orjson.dumps({"status": "healthy"})[:-1]
 
 @app.get("/")
 async def read_root():
-    return {
-        "message": "ShareZidi v3.0 - Ultimate P2P File Transfer (TEST)",
-        "status": "running",
-        "features": [
-            "WebRTC P2P streaming",
-            "Real-time progress tracking", 
-            "Adaptive optimization",
-            "Multi-device support",
-            "Mobile optimized"
-        ],
-        "webrtc_available": WEBRTC_AVAILABLE,
-        "active_connections": len(manager.active_connections)
-    }
+    return Response(
+        content=b'%b,"active_connections":%d}' % (
+            _ROOT_PREFIX, len(manager.active_connections)),
+        media_type="application/json"
+    )
 
 @app.get("/health")
 async def health_check():
-    return {
-        "status": "healthy",
-        "active_connections": len(manager.active_connections),
-        "active_transfers": len(active_transfers),
-        "webrtc_connections": len(webrtc_handler.pcs) if WEBRTC_IMPORTS_AVAILABLE else 0,
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(
+        content=b'%b,"active_connections":%d,"active_transfers":%d,"webrtc_connections":%d,"timestamp":"%b"}' % (
+            _HEALTH_PREFIX,
+            len(manager.active_connections),
+            len(transfers),
+            len(webrtc_handler.pcs) if WEBRTC_IMPORTS_AVAILABLE else 0,
+            _iso(_now_ns()).encode()),
+        media_type="application/json"
+    )
 
 @app.get("/stats")
 async def get_stats():
@@ -119,14 +402,17 @@ async def get_stats():
             "clients": list(manager.active_connections.keys())
         },
         "transfers": {
-            "active": len(active_transfers),
+            "active": len(transfers),
             "webrtc_available": WEBRTC_AVAILABLE
         },
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso(_now_ns())
     }
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
+    # Interned ids win CPython's pointer-equality fast path on every dict
+    # lookup for the rest of the connection
+    client_id = sys.intern(client_id)
     # Get client info from query parameters
     client_info = {
         "device_type": websocket.query_params.get("device_type", "unknown"),
@@ -134,15 +420,31 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
         "supports_p2p": websocket.query_params.get("supports_p2p", "false").lower() == "true",
         "max_chunk_size": int(websocket.query_params.get("max_chunk_size", "1048576")),  # 1MB default
         "ip_address": websocket.client.host if websocket.client else "unknown",
-        "connected_at": datetime.now().isoformat()
+        "connected_at_ns": _now_ns()
     }
     
     await manager.connect(websocket, client_id, client_info)
     
+    use_msgpack = manager.client_packs.get(client_id) is not _dumps
+    # Resolved once; the per-chunk hot path then works in integers
+    client_slot = manager.client_slots[client_id]
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            raw = await websocket.receive()
+            if raw["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(raw.get("code", 1000))
+            data = raw.get("bytes")
+            if data is not None:
+                if data[0] == _BIN_CHUNK:
+                    # Chunk frames bypass deserialization entirely
+                    await handle_file_chunk_bin(client_slot, data)
+                    continue
+                # Binary frame: msgpack for negotiated clients, else orjson
+                # parses the bytes without a UTF-8 str round-trip
+                message = (msgpack.unpackb(data, raw=False) if use_msgpack
+                           else orjson.loads(data))
+            else:
+                message = orjson.loads(raw["text"])
             
             # Handle different message types
             await handle_message(client_id, message, websocket)
@@ -156,33 +458,25 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
 
 async def handle_message(client_id: str, message: Dict, websocket: WebSocket):
     """Handle incoming WebSocket messages"""
-    message_type = message.get("type")
-    
-    if message_type == "ping":
-        await manager.send_personal_message({
-            "type": "pong",
-            "timestamp": datetime.now().isoformat()
-        }, client_id)
-    
-    elif message_type == "client_info":
-        # Update client info
-        manager.client_info[client_id].update(message)
-        await manager.send_personal_message({
-            "type": "client_info_updated",
-            "status": "success"
-        }, client_id)
-    
-    elif message_type == "start_transfer":
-        await handle_start_transfer(client_id, message, websocket)
-    
-    elif message_type == "file_chunk":
-        await handle_file_chunk(client_id, message, websocket)
-    
-    elif message_type == "transfer_complete":
-        await handle_transfer_complete(client_id, message, websocket)
-    
-    else:
-        logger.warning(f"Unknown message type: {message_type} from {client_id}")
+    # One hashed lookup instead of an elif ladder of string compares
+    await _HANDLERS.get(message.get("type"), _unknown)(client_id, message, websocket)
+
+async def _ping(client_id: str, message: Dict, websocket: WebSocket):
+    await manager.send_personal_message({
+        "type": "pong",
+        "t": _now_ns()
+    }, client_id)
+
+async def _client_info(client_id: str, message: Dict, websocket: WebSocket):
+    # Update client info
+    manager.client_info[client_id].update(message)
+    await manager.send_personal_message({
+        "type": "client_info_updated",
+        "status": "success"
+    }, client_id)
+
+async def _unknown(client_id: str, message: Dict, websocket: WebSocket):
+    logger.warning(f"Unknown message type: {message.get('type')} from {client_id}")
 
 async def handle_start_transfer(client_id: str, message: Dict, websocket: WebSocket):
     """Handle file transfer initiation"""
@@ -209,15 +503,7 @@ async def handle_start_transfer(client_id: str, message: Dict, websocket: WebSoc
         transfer_id = str(uuid.uuid4())
         
         # Store transfer info
-        active_transfers[transfer_id] = {
-            "id": transfer_id,
-            "sender_id": client_id,
-            "receiver_id": receiver_id,
-            "file_info": file_info,
-            "status": "pending",
-            "created_at": datetime.now().isoformat(),
-            "progress": 0
-        }
+        transfers.alloc(transfer_id, client_id, receiver_id, file_info)
         
         # Notify receiver
         await manager.send_personal_message({
@@ -250,18 +536,17 @@ async def handle_file_chunk(client_id: str, message: Dict, websocket: WebSocket)
         chunk_data = message.get("chunk_data")
         chunk_index = message.get("chunk_index")
         
-        if transfer_id not in active_transfers:
+        idx = transfers.id_to_idx.get(transfer_id)
+        if idx is None:
             await manager.send_personal_message({
                 "type": "error",
                 "message": f"Transfer {transfer_id} not found"
             }, client_id)
             return
         
-        transfer = active_transfers[transfer_id]
-        
         # Forward chunk to receiver
-        if client_id == transfer["sender_id"]:
-            receiver_id = transfer["receiver_id"]
+        if client_id == transfers.sender_id[idx]:
+            receiver_id = transfers.receiver_id[idx]
             await manager.send_personal_message({
                 "type": "file_chunk",
                 "transfer_id": transfer_id,
@@ -269,10 +554,10 @@ async def handle_file_chunk(client_id: str, message: Dict, websocket: WebSocket)
                 "chunk_index": chunk_index
             }, receiver_id)
             
-            # Update progress
-            total_chunks = transfer["file_info"].get("total_chunks", 1)
-            progress = min(100, (chunk_index + 1) / total_chunks * 100)
-            transfer["progress"] = progress
+            # Update progress: single indexed stores into the typed arrays
+            progress = min(100, (chunk_index + 1) / transfers.total_chunks[idx] * 100)
+            transfers.progress[idx] = progress
+            transfers.chunks_relayed[idx] += 1
             
             # Send progress update to sender
             await manager.send_personal_message({
@@ -290,30 +575,44 @@ async def handle_transfer_complete(client_id: str, message: Dict, websocket: Web
     try:
         transfer_id = message.get("transfer_id")
         
-        if transfer_id in active_transfers:
-            transfer = active_transfers[transfer_id]
-            transfer["status"] = "completed"
-            transfer["completed_at"] = datetime.now().isoformat()
-            transfer["progress"] = 100
+        idx = transfers.id_to_idx.get(transfer_id)
+        if idx is not None:
+            transfers.status[idx] = "completed"
+            transfers.completed_at_ns[idx] = _now_ns()
+            transfers.progress[idx] = 100.0
             
             # Notify both sender and receiver
             await manager.send_personal_message({
                 "type": "transfer_completed",
                 "transfer_id": transfer_id,
                 "status": "completed"
-            }, transfer["sender_id"])
+            }, transfers.sender_id[idx])
             
             await manager.send_personal_message({
                 "type": "transfer_completed", 
                 "transfer_id": transfer_id,
                 "status": "completed"
-            }, transfer["receiver_id"])
+            }, transfers.receiver_id[idx])
+            
+            # Evict after a grace window instead of leaking the entry
+            asyncio.get_running_loop().call_later(
+                _COMPLETED_GRACE_S, transfers.release, transfer_id)
             
             logger.info(f"Transfer {transfer_id} completed")
         
     except Exception as e:
         logger.error(f"Error handling transfer completion: {e}")
 
+# Frozen at import; literal keys are interned so lookups take the
+# pointer-equality fast path
+_HANDLERS = {
+    "ping": _ping,
+    "client_info": _client_info,
+    "start_transfer": handle_start_transfer,
+    "file_chunk": handle_file_chunk,
+    "transfer_complete": handle_transfer_complete,
+}
+
 @app.get("/test2", response_class=HTMLResponse)
 async def test2_page():
     """Clean test page for WebSocket testing - TEST2"""
@@ -356,8 +655,11 @@ async def test2_page():
                 log('WebSocket connected to port 8003');
             };
             
+            ws.binaryType = 'arraybuffer';  // server sends binary JSON frames
+            const decoder = new TextDecoder();
             ws.onmessage = function(event) {
-                const message = JSON.parse(event.data);
+                const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+                const message = JSON.parse(text);
                 console.log('TEST2: Received:', message);
                 log('Received: ' + JSON.stringify(message));
             };
@@ -460,8 +762,11 @@ async def test_page():
                 }));
             };
             
+            ws.binaryType = 'arraybuffer';  // server sends binary JSON frames
+            const decoder = new TextDecoder();
             ws.onmessage = function(event) {
-                const message = JSON.parse(event.data);
+                const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+                const message = JSON.parse(text);
                 console.log('Received:', message);
                 
                 const messagesDiv = document.getElementById('messages');
@@ -508,4 +813,10 @@ if __name__ == "__main__":
     print("🌐 Test2 page: http://localhost:8004/test2")
     print("📊 Stats: http://localhost:8004/stats")
     print("=" * 50)
-    uvicorn.run(app, host="127.0.0.1", port=8004, log_level="info")
+    # uvloop + httptools cut per-frame socket overhead on the WebSocket
+    # receive/send hot path (uvicorn[standard] ships both)
+    # permessage-deflate would re-compress the shared broadcast buffer per
+    # client, defeating the encode-once path; payloads here are small JSON
+    uvicorn.run(app, host="127.0.0.1", port=8004, log_level="info",
+                loop="uvloop", http="httptools", ws="websockets",
+                ws_per_message_deflate=False)
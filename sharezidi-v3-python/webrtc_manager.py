@@ -6,11 +6,53 @@ Handles WebRTC signaling and connection management
 import json
 import logging
 import asyncio
+import itertools
+import os
+import time
+from collections import deque
 from typing import Dict, Any, Optional, Callable
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger(__name__)
 
+# Records carry integer nanosecond stamps; ISO strings are built only when
+# a caller actually serializes them outward
+_now_ns = time.time_ns
+
+def _iso(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).isoformat()
+
+class _ConnRecord:
+    """Recyclable per-connection signaling record. __slots__ drops the dict
+    header per instance, and a freelist recycles records on cleanup so each
+    transfer stops costing a burst of small allocations and GC churn."""
+    __slots__ = ("sender_id", "receiver_id", "file_info", "status",
+                 "created_at_ns", "ice_candidates", "offer", "answer")
+
+    def __init__(self):
+        # ICE can trickle hundreds of candidates; the ring keeps the most
+        # recent 64 and caps memory per connection
+        self.ice_candidates = deque(maxlen=64)
+
+    def reset(self, sender_id: str, receiver_id: str, file_info: Dict):
+        self.sender_id = sender_id
+        self.receiver_id = receiver_id
+        self.file_info = file_info
+        self.status = "initiating"
+        self.created_at_ns = _now_ns()
+        self.ice_candidates.clear()
+        self.offer = None
+        self.answer = None
+        return self
+
+# Ids only need process-local uniqueness: a monotonic counter beats a
+# wall-clock read plus float formatting per id, and the pid prefix keeps
+# ids distinct across workers
+_id_prefix = os.getpid()
+_id_counter = itertools.count()
+
+_POOL_MAX = 256
+
 class WebRTCManager:
     """
     Manages WebRTC connections for P2P file transfer
@@ -18,28 +60,22 @@ class WebRTCManager:
     """
     
     def __init__(self):
-        self.active_connections: Dict[str, Dict] = {}
+        self.active_connections: Dict[str, _ConnRecord] = {}
         self.pending_offers: Dict[str, Dict] = {}
         self.pending_answers: Dict[str, Dict] = {}
         self.ice_candidates: Dict[str, list] = {}
+        self._record_pool: list = []
         
     async def initiate_connection(self, sender_id: str, receiver_id: str, file_info: Dict) -> str:
         """
         Initiate WebRTC connection between sender and receiver
         Returns connection ID for tracking
         """
-        connection_id = f"webrtc_{sender_id}_{receiver_id}_{datetime.now().timestamp()}"
+        connection_id = f"webrtc_{sender_id}_{receiver_id}_{_id_prefix}_{next(_id_counter)}"
         
-        self.active_connections[connection_id] = {
-            "sender_id": sender_id,
-            "receiver_id": receiver_id,
-            "file_info": file_info,
-            "status": "initiating",
-            "created_at": datetime.now().isoformat(),
-            "ice_candidates": [],
-            "offer": None,
-            "answer": None
-        }
+        record = self._record_pool.pop() if self._record_pool else _ConnRecord()
+        self.active_connections[connection_id] = record.reset(
+            sender_id, receiver_id, file_info)
         
         logger.info(f"WebRTC connection initiated: {connection_id}")
         return connection_id
@@ -52,12 +88,12 @@ class WebRTCManager:
             
         connection = self.active_connections[connection_id]
         
-        if connection["sender_id"] != client_id:
+        if connection.sender_id != client_id:
             logger.warning(f"Offer from wrong sender for connection: {connection_id}")
             return False
             
-        connection["offer"] = offer
-        connection["status"] = "offer_received"
+        connection.offer = offer
+        connection.status = "offer_received"
         
         logger.info(f"WebRTC offer received for connection: {connection_id}")
         return True
@@ -70,12 +106,12 @@ class WebRTCManager:
             
         connection = self.active_connections[connection_id]
         
-        if connection["receiver_id"] != client_id:
+        if connection.receiver_id != client_id:
             logger.warning(f"Answer from wrong receiver for connection: {connection_id}")
             return False
             
-        connection["answer"] = answer
-        connection["status"] = "answer_received"
+        connection.answer = answer
+        connection.status = "answer_received"
         
         logger.info(f"WebRTC answer received for connection: {connection_id}")
         return True
@@ -88,45 +124,68 @@ class WebRTCManager:
             
         connection = self.active_connections[connection_id]
         
-        if client_id not in [connection["sender_id"], connection["receiver_id"]]:
+        if client_id not in (connection.sender_id, connection.receiver_id):
             logger.warning(f"ICE candidate from unknown client: {client_id}")
             return False
             
-        connection["ice_candidates"].append({
-            "candidate": candidate,
-            "from_client": client_id,
-            "timestamp": datetime.now().isoformat()
-        })
+        # High-frequency during ICE gathering: a bare 3-tuple has no dict
+        # header per entry and appends faster; the timestamp is a raw
+        # monotonic integer, formatted only if ever read
+        connection.ice_candidates.append(
+            (candidate, client_id, time.monotonic_ns()))
         
         logger.info(f"ICE candidate received for connection: {connection_id} from {client_id}")
         return True
     
     async def get_connection_info(self, connection_id: str) -> Optional[Dict]:
         """Get connection information"""
-        return self.active_connections.get(connection_id)
+        record = self.active_connections.get(connection_id)
+        if record is None:
+            return None
+        # Materialize a dict view only on this cold read path
+        return {
+            "sender_id": record.sender_id,
+            "receiver_id": record.receiver_id,
+            "file_info": record.file_info,
+            "status": record.status,
+            "created_at": _iso(record.created_at_ns),
+            "ice_candidates": [
+                {"candidate": c, "from_client": f, "t_ns": t}
+                for c, f, t in record.ice_candidates
+            ],
+            "offer": record.offer,
+            "answer": record.answer
+        }
     
     async def update_connection_status(self, connection_id: str, status: str):
         """Update connection status"""
-        if connection_id in self.active_connections:
-            self.active_connections[connection_id]["status"] = status
+        connection = self.active_connections.get(connection_id)
+        if connection is not None:
+            connection.status = status
+            if status == "connected":
+                # Trickling is over; the gathered candidates are dead weight
+                connection.ice_candidates.clear()
             logger.info(f"Connection {connection_id} status updated to: {status}")
     
     async def cleanup_connection(self, connection_id: str):
         """Clean up connection resources"""
-        if connection_id in self.active_connections:
-            del self.active_connections[connection_id]
+        record = self.active_connections.pop(connection_id, None)
+        if record is not None:
+            record.file_info = None
+            if len(self._record_pool) < _POOL_MAX:
+                self._record_pool.append(record)
             logger.info(f"Connection {connection_id} cleaned up")
     
     async def get_connections_for_client(self, client_id: str) -> list:
         """Get all connections for a specific client"""
         connections = []
         for conn_id, conn_info in self.active_connections.items():
-            if client_id in [conn_info["sender_id"], conn_info["receiver_id"]]:
+            if client_id in (conn_info.sender_id, conn_info.receiver_id):
                 connections.append({
                     "connection_id": conn_id,
-                    "status": conn_info["status"],
-                    "file_info": conn_info["file_info"],
-                    "created_at": conn_info["created_at"]
+                    "status": conn_info.status,
+                    "file_info": conn_info.file_info,
+                    "created_at": _iso(conn_info.created_at_ns)
                 })
         return connections
 
@@ -143,7 +202,7 @@ class P2PTransferManager:
         
     async def start_transfer(self, sender_id: str, receiver_id: str, file_info: Dict) -> str:
         """Start a new P2P file transfer"""
-        transfer_id = f"transfer_{sender_id}_{receiver_id}_{datetime.now().timestamp()}"
+        transfer_id = f"transfer_{sender_id}_{receiver_id}_{_id_prefix}_{next(_id_counter)}"
         
         # Create WebRTC connection
         connection_id = await self.webrtc_manager.initiate_connection(
@@ -162,7 +221,7 @@ class P2PTransferManager:
             "chunks_sent": 0,
             "chunks_received": 0,
             "total_chunks": file_info.get("total_chunks", 0),
-            "started_at": datetime.now().isoformat(),
+            "started_at_ns": _now_ns(),
             "transfer_speed": 0,
             "estimated_time": 0
         }
@@ -198,7 +257,13 @@ class P2PTransferManager:
         if transfer_id in self.active_transfers:
             self.active_transfers[transfer_id]["status"] = "completed"
             self.active_transfers[transfer_id]["progress"] = 100.0
-            self.active_transfers[transfer_id]["completed_at"] = datetime.now().isoformat()
+            self.active_transfers[transfer_id]["completed_at_ns"] = _now_ns()
+            
+            # Drop the records after a grace window; completed transfers
+            # otherwise accumulate for the process lifetime
+            loop = asyncio.get_running_loop()
+            loop.call_later(60.0, self.active_transfers.pop, transfer_id, None)
+            loop.call_later(60.0, self.transfer_stats.pop, transfer_id, None)
             
             logger.info(f"Transfer {transfer_id} completed")
     
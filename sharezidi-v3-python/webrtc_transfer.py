@@ -4,10 +4,12 @@ Using aiortc for true peer-to-peer connections
 """
 
 import asyncio
-import json
+import binascii
+import hashlib
 import logging
+import struct
+import time
 from typing import Dict, Any, Optional, Callable
-from datetime import datetime
 
 try:
     from aiortc import RTCPeerConnection, RTCSessionDescription, RTCConfiguration, RTCIceServer
@@ -19,20 +21,49 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Binary chunk frame: fixed little-endian header followed by the raw chunk
+# bytes. The 8-byte transfer-id hash lets a receiver demultiplex without
+# carrying the full id string in every frame.
+_CHUNK_HEADER = struct.Struct("<IIQ")  # chunk_index, total_chunks, tid_hash
+_CHUNK_HEADER_SIZE = _CHUNK_HEADER.size
+
+def _tid_hash(transfer_id: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(transfer_id.encode(), digest_size=8).digest(), "little")
+
 class WebRTCTransferHandler:
     """
     Real WebRTC implementation using aiortc
     Handles P2P file transfers with data channels
     """
     
-    def __init__(self, on_data_channel_message: Callable, on_connection_state_change: Callable):
+    def __init__(self, on_data_channel_message: Callable, on_connection_state_change: Callable,
+                 sctp_send_buffer: int = 4 * 1024 * 1024,
+                 sctp_recv_buffer: int = 4 * 1024 * 1024,
+                 ordered: bool = False):
         if not WEBRTC_AVAILABLE:
             raise ImportError("aiortc is required for WebRTC functionality")
             
+        # Bigger SCTP windows keep throughput usable at non-zero RTT;
+        # unordered delivery avoids head-of-line blocking for bulk chunks
+        # (the header carries the chunk index, so order is reconstructible)
+        self.sctp_send_buffer = sctp_send_buffer
+        self.sctp_recv_buffer = sctp_recv_buffer
+        # aiortc exposes no send-side socket knob, so the send buffer maps
+        # onto the bufferedAmount backpressure marks: park once a quarter
+        # of it is queued, resume when that has mostly drained (the 4 MiB
+        # default reproduces the original 1 MiB / 256 KiB marks)
+        self.buffer_high_water = sctp_send_buffer // 4
+        self.buffer_low_water = sctp_send_buffer // 16
+        self.ordered = ordered
         self.pcs: Dict[str, RTCPeerConnection] = {}
         self.data_channels: Dict[str, Any] = {}
         self.on_data_channel_message = on_data_channel_message
         self.on_connection_state_change = on_connection_state_change
+        # Memoized 8-byte transfer-id hashes for binary chunk headers
+        self._tid_hashes: Dict[str, int] = {}
+        # Per-channel "buffer drained" events for send-side backpressure
+        self.buffer_low_events: Dict[str, asyncio.Event] = {}
         
         # STUN servers for NAT traversal
         self.ice_servers = [
@@ -61,6 +92,7 @@ class WebRTCTransferHandler:
                 # Implement retry logic here
             elif state == "connected":
                 logger.info(f"WebRTC connection established for {transfer_id}")
+                self._tune_sctp(transfer_id, pc)
         
         # ICE candidate handler
         @pc.on("icecandidate")
@@ -71,7 +103,7 @@ class WebRTCTransferHandler:
         
         if is_initiator:
             # Create data channel for sending files
-            channel = pc.createDataChannel("file-transfer", ordered=True)
+            channel = pc.createDataChannel("file-transfer", ordered=self.ordered)
             self.data_channels[transfer_id] = channel
             logger.info(f"Created data channel for {transfer_id} (initiator)")
             self._setup_data_channel_events(transfer_id, channel)
@@ -85,8 +117,32 @@ class WebRTCTransferHandler:
         
         return pc
     
+    def _tune_sctp(self, transfer_id: str, pc: Any):
+        """Widen the SCTP receive window once the transport exists. aiortc
+        keeps these knobs private, so this is best-effort against the
+        installed version and a no-op if the attributes move."""
+        try:
+            sctp = pc.sctp
+            if sctp is not None:
+                sctp._advertised_rwnd = self.sctp_recv_buffer
+                logger.info(f"SCTP rwnd for {transfer_id} set to {self.sctp_recv_buffer}")
+        except AttributeError:
+            logger.debug(f"SCTP tuning not supported for {transfer_id}")
+    
+    # Sending stops above buffer_high_water and resumes once buffered data
+    # drains below buffer_low_water; without this the SCTP buffer fills and
+    # throughput collapses instead of holding steady
     def _setup_data_channel_events(self, transfer_id: str, channel: Any):
         """Setup data channel event handlers"""
+        channel.bufferedAmountLowThreshold = self.buffer_low_water
+        low_event = asyncio.Event()
+        low_event.set()
+        self.buffer_low_events[transfer_id] = low_event
+        
+        @channel.on("bufferedamountlow")
+        def on_buffered_amount_low():
+            low_event.set()
+        
         @channel.on("open")
         def on_open():
             logger.info(f"Data channel for {transfer_id} is open!")
@@ -191,19 +247,15 @@ class WebRTCTransferHandler:
             return False
     
     async def send_file_chunk(self, transfer_id: str, chunk_data: bytes, chunk_index: int, total_chunks: int):
-        """Send a file chunk via WebRTC data channel"""
-        # Create chunk message
-        chunk_message = {
-            "type": "file_chunk",
-            "chunk_index": chunk_index,
-            "total_chunks": total_chunks,
-            "data": chunk_data.hex(),  # Convert bytes to hex string for JSON
-            "timestamp": datetime.now().isoformat()
-        }
+        """Send a file chunk as a binary data-channel message: a fixed
+        16-byte header followed by the raw bytes. No hex doubling, no JSON
+        encode — one concatenation per chunk."""
+        tid_hash = self._tid_hashes.get(transfer_id)
+        if tid_hash is None:
+            tid_hash = self._tid_hashes[transfer_id] = _tid_hash(transfer_id)
         
-        # Send as JSON string
-        message_json = json.dumps(chunk_message)
-        success = await self.send_data_via_webrtc(transfer_id, message_json.encode())
+        header = _CHUNK_HEADER.pack(chunk_index, total_chunks, tid_hash)
+        success = await self.send_data_via_webrtc(transfer_id, header + chunk_data)
         
         if success:
             logger.debug(f"Sent chunk {chunk_index}/{total_chunks} for {transfer_id}")
@@ -220,6 +272,10 @@ class WebRTCTransferHandler:
             logger.info(f"Closed WebRTC peer connection for {transfer_id}")
         
         self.data_channels.pop(transfer_id, None)
+        self._tid_hashes.pop(transfer_id, None)
+        event = self.buffer_low_events.pop(transfer_id, None)
+        if event is not None:
+            event.set()
     
     async def get_connection_state(self, transfer_id: str) -> Optional[str]:
         """Get the current connection state"""
@@ -244,7 +300,9 @@ class WebRTCFileTransfer:
     def __init__(self, webrtc_handler: WebRTCTransferHandler):
         self.webrtc_handler = webrtc_handler
         self.active_transfers: Dict[str, Dict] = {}
-        self.chunk_size = 64 * 1024  # 64KB default chunk size
+        # Practical DataChannel message max, minus the binary frame header:
+        # 4x fewer sends per MB than the old 64 KiB default
+        self.chunk_size = 256 * 1024 - 16
         
     async def start_file_transfer(self, transfer_id: str, file_info: Dict, sender_id: str, receiver_id: str):
         """Start a WebRTC file transfer"""
@@ -257,7 +315,7 @@ class WebRTCFileTransfer:
             "chunks_sent": 0,
             "chunks_received": 0,
             "total_chunks": file_info.get("total_chunks", 0),
-            "started_at": datetime.now().isoformat()
+            "started_at_ns": time.time_ns()
         }
         
         logger.info(f"Started WebRTC file transfer: {transfer_id}")
@@ -272,11 +330,21 @@ class WebRTCFileTransfer:
         transfer = self.active_transfers[transfer_id]
         total_chunks = transfer["total_chunks"]
         
+        channel = self.webrtc_handler.data_channels.get(transfer_id)
+        low_event = self.webrtc_handler.buffer_low_events.get(transfer_id)
+        
         for i in range(total_chunks):
             start = i * self.chunk_size
             end = min(start + self.chunk_size, len(file_data))
             chunk_data = file_data[start:end]
             
+            # Backpressure: above the high-water mark, park until the
+            # channel signals bufferedamountlow instead of overrunning SCTP
+            if (channel is not None and low_event is not None
+                    and channel.bufferedAmount > self.webrtc_handler.buffer_high_water):
+                low_event.clear()
+                await low_event.wait()
+            
             success = await self.webrtc_handler.send_file_chunk(
                 transfer_id, chunk_data, i, total_chunks
             )
@@ -302,9 +370,20 @@ class WebRTCFileTransfer:
             return
         
         transfer = self.active_transfers[transfer_id]
-        chunk_index = chunk_message["chunk_index"]
-        total_chunks = chunk_message["total_chunks"]
-        chunk_data = bytes.fromhex(chunk_message["data"])
+        if isinstance(chunk_message, (bytes, bytearray, memoryview)):
+            # Binary frame: header fields plus a zero-copy view of the data
+            chunk_index, total_chunks, _ = _CHUNK_HEADER.unpack_from(chunk_message, 0)
+            chunk_data = memoryview(chunk_message)[_CHUNK_HEADER_SIZE:]
+        else:
+            # Legacy JSON envelope. base64 (C-implemented a2b_base64, ~33%
+            # smaller than hex) is preferred; hex remains for old senders
+            chunk_index = chunk_message["chunk_index"]
+            total_chunks = chunk_message["total_chunks"]
+            data_b64 = chunk_message.get("data_b64")
+            if data_b64 is not None:
+                chunk_data = binascii.a2b_base64(data_b64)
+            else:
+                chunk_data = bytes.fromhex(chunk_message["data"])
         
         # Update progress
         progress = ((chunk_index + 1) / total_chunks) * 100
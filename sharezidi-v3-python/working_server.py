@@ -6,11 +6,14 @@ No emojis to avoid Unicode issues
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
+import asyncio
 import json
 import uuid
 import logging
 from typing import Dict, Optional
 
+import orjson
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -56,6 +59,18 @@ class ConnectionManager:
                 return False
         return False
 
+    async def send_to_client_bytes(self, client_id: str, message: bytes):
+        """Same as send_to_client but for pre-encoded frames: the payload is
+        serialized once by the caller and written as a binary frame."""
+        if client_id in self.active_connections:
+            try:
+                await self.active_connections[client_id].send_bytes(message)
+                return True
+            except Exception as e:
+                logger.error(f"Failed to send message to {client_id}: {e}")
+                return False
+        return False
+
 manager = ConnectionManager()
 
 @app.get("/")
@@ -185,24 +200,32 @@ async def handle_file_chunk(client_id: str, message: Dict, websocket: WebSocket)
         manager.transfers[transfer_id]["progress"] = progress
         manager.transfers[transfer_id]["chunks_received"] = chunk_index + 1
     
-    # Send progress update to sender
-    await websocket.send_text(json.dumps({
+    # Encode both frames up front with orjson (straight to bytes, no str
+    # round-trip), then write them concurrently: the progress update does
+    # not need to wait behind the chunk forward
+    progress_msg = orjson.dumps({
         "type": "progress_update",
         "transfer_id": transfer_id,
         "progress": progress,
         "chunk_index": chunk_index
-    }))
-    
-    # Forward chunk to receiver (P2P - no server storage)
+    })
+
     if transfer_id in manager.transfers:
+        # Forward chunk to receiver (P2P - no server storage)
         receiver_id = manager.transfers[transfer_id]["receiver_id"]
-        await manager.send_to_client(receiver_id, json.dumps({
+        fwd_msg = orjson.dumps({
             "type": "file_chunk",
             "transfer_id": transfer_id,
             "chunk_data": chunk_data,
             "chunk_index": chunk_index,
             "total_chunks": total_chunks
-        }))
+        })
+        await asyncio.gather(
+            websocket.send_bytes(progress_msg),
+            manager.send_to_client_bytes(receiver_id, fwd_msg),
+        )
+    else:
+        await websocket.send_bytes(progress_msg)
 
 async def handle_chunk_ack(client_id: str, message: Dict, websocket: WebSocket):
     """Handle chunk acknowledgment"""
@@ -263,7 +286,9 @@ async def test_page():
         <script>
             const clientId = 'test-client-' + Math.random().toString(36).substr(2, 9);
             const ws = new WebSocket(`ws://localhost:8000/ws/${clientId}`);
-            
+            ws.binaryType = 'arraybuffer';  // chunk-path frames arrive as binary JSON
+            const decoder = new TextDecoder();
+
             ws.onopen = function(event) {
                 document.getElementById('status').textContent = 'Connected!';
                 document.getElementById('status').className = 'status connected';
@@ -271,7 +296,8 @@ async def test_page():
             };
             
             ws.onmessage = function(event) {
-                const message = JSON.parse(event.data);
+                const text = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+                const message = JSON.parse(text);
                 console.log('Received:', message);
                 
                 const messagesDiv = document.getElementById('messages');